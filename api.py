@@ -0,0 +1,195 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import Blueprint, abort, current_app, jsonify, request
+
+from database import read_replica
+from models.models import Artist, Venue, genre_names
+from services.calendar import calendar_filters
+from services.listings import show_listing, show_listing_version
+from services.loaders import (
+    artist_to_dict,
+    artist_version,
+    load_artist,
+    load_venue,
+    venue_to_dict,
+    venue_version,
+)
+
+api_blueprint = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# *----------------------------------------------------------------------------#
+# * Conditional GET
+# *----------------------------------------------------------------------------#
+# Every response carries a strong ETag and a Last-Modified date derived from a
+# cheap version query (``updated_at`` columns and the latest show that has
+# started), so a client revalidating an unchanged resource gets a 304 before
+# any of the show queries behind the body run. ``?fields=a,b`` trims the body
+# to those fields and is part of the ETag. ``updated_at`` is UTC while show
+# times are local, so each is converted to an aware UTC time on its own.
+
+COMMON_FIELDS = {
+    "id",
+    "name",
+    "genres",
+    "city",
+    "state",
+    "phone",
+    "website_link",
+    "facebook_link",
+    "seeking_description",
+    "image_link",
+}
+SHOW_FIELDS = {
+    "past_shows",
+    "upcoming_shows",
+    "past_shows_count",
+    "upcoming_shows_count",
+}
+VENUE_FIELDS = COMMON_FIELDS | SHOW_FIELDS | {"address", "seeking_talent"}
+ARTIST_FIELDS = COMMON_FIELDS | SHOW_FIELDS | {"seeking_venue"}
+SHOW_LISTING_FIELDS = {
+    "venue_id",
+    "venue_name",
+    "artist_id",
+    "artist_name",
+    "artist_image_link",
+    "start_time",
+}
+
+
+def _fields(allowed):
+    fields = request.args.get("fields")
+    if not fields:
+        return None
+    fields = set(fields.split(","))
+    if not fields <= allowed:
+        abort(400, f"Unknown fields: {', '.join(sorted(fields - allowed))}")
+    return fields
+
+
+def _sparse(data, fields):
+    if fields is None:
+        return data
+    return {key: value for key, value in data.items() if key in fields or key == "id"}
+
+
+def _utc(value):
+    """Return a naive UTC ``updated_at`` value as an aware datetime."""
+    return value.replace(tzinfo=timezone.utc) if value is not None else None
+
+
+def _local_to_utc(value):
+    """Return a naive local ``Show.start_time`` as an aware UTC datetime."""
+    return value.astimezone(timezone.utc) if value is not None else None
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match takes precedence over If-Modified-Since, RFC 7232 3.3
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    since = request.if_modified_since
+    if since is None or last_modified is None:
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_json(version, build, last_modified=None):
+    """Return ``build()`` as JSON, or a 304 if the client's copy of
+    ``version`` is current.
+
+    ``last_modified`` is an aware datetime, or None to send no Last-Modified.
+    """
+    etag = hashlib.sha1(repr((request.full_path, version)).encode()).hexdigest()
+    if _not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
+# *----------------------------------------------------------------------------#
+# * Resources
+# *----------------------------------------------------------------------------#
+
+
+def _detail(id, allowed, to_dict, load, version, model):
+    fields = _fields(allowed)
+    now = datetime.now()
+    current = version(id, now)
+    if current is None:
+        abort(404)
+    updated_at, counterparts_updated_at, started = current
+    last_modified = max(
+        filter(
+            None,
+            (_utc(updated_at), _utc(counterparts_updated_at), _local_to_utc(started)),
+        )
+    )
+
+    def build():
+        if fields is not None and not fields & SHOW_FIELDS:
+            # no show fields asked for, skip the show join
+            data = to_dict(model.query.get(id))
+        else:
+            data = load(id, now)
+        # the column holds a Postgres array literal such as "{Jazz,Rock}"
+        return _sparse({**data, "genres": genre_names(data["genres"])}, fields)
+
+    return conditional_json(current, build, last_modified)
+
+
+@api_blueprint.route("/venues/<int:venue_id>")
+@read_replica
+def venue(venue_id):
+    return _detail(
+        venue_id, VENUE_FIELDS, venue_to_dict, load_venue, venue_version, Venue
+    )
+
+
+@api_blueprint.route("/artists/<int:artist_id>")
+@read_replica
+def artist(artist_id):
+    return _detail(
+        artist_id, ARTIST_FIELDS, artist_to_dict, load_artist, artist_version, Artist
+    )
+
+
+@api_blueprint.route("/shows")
+@read_replica
+def shows():
+    # the /shows listing and calendar, a keyset page at a time
+    fields = _fields(SHOW_LISTING_FIELDS)
+    try:
+        filters = calendar_filters(request.args)
+    except ValueError:
+        abort(400)
+
+    def build():
+        try:
+            page = show_listing(
+                after=request.args.get("after"),
+                before=request.args.get("before"),
+                limit=request.args.get("limit", type=int),
+                **filters,
+            )
+        except ValueError:
+            abort(400)
+        return {
+            "shows": [_sparse(show, fields) for show in page.items],
+            "next": page.next_cursor,
+            "prev": page.prev_cursor,
+        }
+
+    current = show_listing_version()
+    last_modified = max(filter(None, map(_utc, current)), default=None)
+    return conditional_json(current, build, last_modified)
+
+
+@api_blueprint.errorhandler(400)
+@api_blueprint.errorhandler(404)
+def error(error):
+    return jsonify({"error": error.description}), error.code
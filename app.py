@@ -1,30 +1,53 @@
 import logging
 import os
+import sys
 from logging import FileHandler, Formatter
 
-import babel
-import dateutil.parser
 from flask import Flask
-from flask_migrate import Migrate
 from flask_moment import Moment
 
 import database
+from api import api_blueprint
+from utils import invalidation, metrics, profiling
 from routes import route_blueprint
+from services import counters, export, importer
 from utils.caching import cache
 
 
-def create_app():
+def create_app(config_object=None):
+    # the Flask CLI calls the factory without arguments, so `flask import` and
+    # the scheduled commands take the deployed config from FYYUR_CONFIG, as
+    # wsgi.py does, and share its cache
+    config_object = config_object or os.environ.get(
+        "FYYUR_CONFIG", "config.DevelopmentConfig"
+    )
     app = Flask(__name__, static_folder="static")
     moment = Moment(app)
-    app.config.from_object("config.DevelopmentConfig")
+    app.config.from_object(config_object)
     database.init_app(app)
-    migrate = Migrate(app, database.db)
-    cache.init_app(
-        app, config={"CACHE_TYPE": "SimpleCache", "CACHE_DEFAULT_TIMEOUT": 300}
-    )
+    # alembic is by far the slowest import and only the `flask db` commands
+    # use it; the Flask CLI has imported flask_migrate by the time it builds
+    # the app for them, workers never import it
+    if "flask_migrate" in sys.modules:
+        from flask_migrate import Migrate
+
+        migrate = Migrate(app, database.db)
+    cache.init_app(app)
+    invalidation.init_app(app)
+    metrics.init_app(app)
+    profiling.init_app(app)
+    importer.init_app(app)
+    export.init_app(app)
+    counters.init_app(app)
     app.register_blueprint(route_blueprint)
+    app.register_blueprint(api_blueprint)
 
     def format_datetime(value, time_format="medium"):
+        # babel and dateutil are slow to import and only needed once a page
+        # formats a date
+        import babel.dates
+        import dateutil.parser
+
         date = dateutil.parser.parse(value)
         if time_format == "full":
             time_format = "EEEE MMMM, d, y 'at' h:mma"
@@ -34,7 +57,7 @@ def create_app():
 
     app.jinja_env.filters["datetime"] = format_datetime
 
-    if app.config["ENV"] == "testing":
+    if app.config.get("ENV") == "testing":
         with app.app_context():
             database.db.create_all()
 
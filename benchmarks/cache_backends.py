@@ -0,0 +1,132 @@
+"""Compare hit ratio and latency of the cache backends with N worker processes.
+
+Every worker replays the same skewed stream of page requests against its own
+Flask-Caching instance, like a gunicorn worker would. A per-process
+SimpleCache has to warm once per worker while the shared backends warm once
+in total.
+
+    python -m benchmarks.cache_backends --workers 4
+    CACHE_REDIS_URL=redis://localhost:6379/15 python -m benchmarks.cache_backends
+"""
+import argparse
+import multiprocessing
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from flask import Flask
+from flask_caching import Cache
+
+import config
+
+
+def backends(cache_dir):
+    return {
+        "SimpleCache": {"CACHE_TYPE": "SimpleCache"},
+        "FileSystemCache": {
+            "CACHE_TYPE": "FileSystemCache",
+            "CACHE_DIR": cache_dir,
+            "CACHE_THRESHOLD": config.Config.CACHE_THRESHOLD,
+        },
+        "RedisCache": {
+            "CACHE_TYPE": "RedisCache",
+            "CACHE_REDIS_URL": config.Config.CACHE_REDIS_URL,
+            "CACHE_KEY_PREFIX": "fyyur-bench:",
+        },
+        "MemcachedCache": {
+            "CACHE_TYPE": "MemcachedCache",
+            "CACHE_MEMCACHED_SERVERS": config.Config.CACHE_MEMCACHED_SERVERS,
+            "CACHE_KEY_PREFIX": "fyyur-bench:",
+        },
+    }
+
+
+def make_cache(settings):
+    app = Flask(__name__)
+    cache = Cache(app, config=dict(settings, CACHE_DEFAULT_TIMEOUT=600))
+    return app, cache
+
+
+def available(settings):
+    # the network backends are skipped when their client library is missing
+    # or nothing is listening locally
+    try:
+        app, cache = make_cache(settings)
+        with app.app_context():
+            return cache.set("bench/ping", 1) and cache.get("bench/ping") == 1
+    except Exception:
+        return False
+
+
+def worker(settings, requests, pages, seed, results):
+    app, cache = make_cache(settings)
+    rng = random.Random(seed)
+    body = b"x" * 20000
+    hits, latencies = 0, []
+    with app.app_context():
+        for _ in range(requests):
+            # mildly skewed towards the most popular pages
+            key = f"view//venues/{int(pages * rng.random() ** 2)}"
+            started = time.perf_counter()
+            if cache.get(key) is None:
+                cache.set(key, body)
+            else:
+                hits += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+    results.put((hits, latencies))
+
+
+def run(settings, workers, requests, pages):
+    app, cache = make_cache(settings)
+    with app.app_context():
+        cache.clear()
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=worker, args=(settings, requests, pages, seed, results)
+        )
+        for seed in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    hits = sum(hits for hits, _ in outcomes)
+    latencies = sorted(ms for _, samples in outcomes for ms in samples)
+    return {
+        "hit_ratio": hits / (workers * requests),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="fyyur-bench-cache-")
+    try:
+        print(f"{'backend':<16} {'hit ratio':>10} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, settings in backends(cache_dir).items():
+            if not available(settings):
+                print(f"{name:<16} {'unavailable':>10}")
+                continue
+            result = run(settings, args.workers, args.requests, args.pages)
+            print(
+                f"{name:<16} {result['hit_ratio']:>10.1%} "
+                f"{result['p50_ms']:>8.3f} {result['p95_ms']:>8.3f}"
+            )
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
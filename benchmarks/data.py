@@ -0,0 +1,161 @@
+"""Seeded synthetic data for the benchmarks.
+
+Venues cluster in a few big cities, genres follow a long tail, popular venues
+and artists get most of the shows and shows spread over the past and the next
+year. The same ``seed`` always yields the same rows, relative to ``now``.
+
+    TEST_DATABASE_URL=postgresql://localhost/fyyur_bench python -m benchmarks.data \
+        --venues 10000 --artists 50000 --shows 1000000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from app import create_app
+from database import db
+from enums import Genres
+from models.models import OWNERS, Artist, Show, Venue, link_genres
+from services.counters import recount
+from utils.text import tokenize
+
+# (city, state, weight), roughly by metro population
+CITIES = [
+    ("New York", "NY", 190),
+    ("Los Angeles", "CA", 130),
+    ("Chicago", "IL", 95),
+    ("Dallas", "TX", 76),
+    ("Houston", "TX", 71),
+    ("Washington", "DC", 63),
+    ("Philadelphia", "PA", 62),
+    ("Miami", "FL", 61),
+    ("Atlanta", "GA", 60),
+    ("Boston", "MA", 49),
+    ("Phoenix", "AZ", 49),
+    ("San Francisco", "CA", 47),
+    ("Seattle", "WA", 40),
+    ("Minneapolis", "MN", 37),
+    ("San Diego", "CA", 33),
+    ("Denver", "CO", 30),
+    ("Baltimore", "MD", 28),
+    ("St. Louis", "MO", 28),
+    ("Charlotte", "NC", 27),
+    ("Portland", "OR", 25),
+    ("Austin", "TX", 23),
+    ("Nashville", "TN", 20),
+    ("New Orleans", "LA", 13),
+    ("Salt Lake City", "UT", 12),
+    ("Memphis", "TN", 13),
+]
+
+BATCH_SIZE = 10000
+
+
+def _zipf_cum_weights(n, s=1.1):
+    return list(accumulate(1 / (rank**s) for rank in range(1, n + 1)))
+
+
+def _genres(rng, genres, weights):
+    picked = set(rng.choices(genres, cum_weights=weights, k=rng.randint(1, 3)))
+    return "{" + ",".join(sorted(picked)) + "}"
+
+
+def _insert(model, rows):
+    for offset in range(0, len(rows), BATCH_SIZE):
+        db.session.bulk_insert_mappings(model, rows[offset : offset + BATCH_SIZE])
+
+
+def generate(venues, artists, shows, seed=0, now=None):
+    """Insert ``venues``, ``artists`` and ``shows`` rows generated from ``seed``.
+
+    Bulk inserts skip the ORM events, so ``search_text``, the Genre links and
+    the show counters are filled in here.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now().replace(minute=0, second=0, microsecond=0)
+    genres = [genre.value for genre in Genres]
+    genre_weights = _zipf_cum_weights(len(genres))
+    city_weights = list(accumulate(weight for _, _, weight in CITIES))
+
+    rows = []
+    for i in range(venues):
+        city, state, _ = rng.choices(CITIES, cum_weights=city_weights)[0]
+        name = f"The {rng.choice(['Hall', 'Room', 'Club', 'Lounge', 'Stage'])} {i}"
+        row = {
+            "name": name,
+            "city": city,
+            "state": state,
+            "address": f"{rng.randint(1, 9999)} {rng.choice(['Main', 'Oak', 'Elm'])} St",
+            "phone": f"{rng.randint(200, 999)}-555-{rng.randint(0, 9999):04d}",
+            "genres": _genres(rng, genres, genre_weights),
+            "seeking_talent": rng.random() < 0.3,
+        }
+        row["search_text"] = " ".join(tokenize(name, city, state, row["genres"]))
+        rows.append(row)
+    _insert(Venue, rows)
+    link_genres(
+        db.session.connection(), Venue, dict(db.session.query(Venue.id, Venue.genres))
+    )
+
+    rows = []
+    for i in range(artists):
+        city, state, _ = rng.choices(CITIES, cum_weights=city_weights)[0]
+        row = {
+            "name": f"Artist {i}",
+            "city": city,
+            "state": state,
+            "phone": f"{rng.randint(200, 999)}-555-{rng.randint(0, 9999):04d}",
+            "genres": _genres(rng, genres, genre_weights),
+            "seeking_venue": rng.random() < 0.5,
+        }
+        row["search_text"] = " ".join(tokenize(row["name"], city, state, row["genres"]))
+        rows.append(row)
+    _insert(Artist, rows)
+    link_genres(
+        db.session.connection(),
+        Artist,
+        dict(db.session.query(Artist.id, Artist.genres)),
+    )
+
+    # popular venues and artists host most of the shows
+    venue_ids = list(range(1, venues + 1))
+    venue_weights = _zipf_cum_weights(venues, 0.8)
+    artist_ids = list(range(1, artists + 1))
+    artist_weights = _zipf_cum_weights(artists, 0.8)
+    start = now - timedelta(days=365)
+    for offset in range(0, shows, BATCH_SIZE):
+        count = min(BATCH_SIZE, shows - offset)
+        db.session.bulk_insert_mappings(
+            Show,
+            [
+                {
+                    "venue_id": venue_id,
+                    "artist_id": artist_id,
+                    "start_time": start + timedelta(minutes=rng.randint(0, 1051200)),
+                }
+                for venue_id, artist_id in zip(
+                    rng.choices(venue_ids, cum_weights=venue_weights, k=count),
+                    rng.choices(artist_ids, cum_weights=artist_weights, k=count),
+                )
+            ],
+        )
+    for model, _, owner in OWNERS:
+        recount(db.session.connection(), model, owner, model.id.isnot(None), now)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--venues", type=int, default=10000)
+    parser.add_argument("--artists", type=int, default=50000)
+    parser.add_argument("--shows", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app("config.TestingConfig")
+    with app.app_context():
+        generate(args.venues, args.artists, args.shows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Load test gunicorn with 1, 2, 4... workers to show throughput scaling.
+
+Seeds a SQLite file, then for every worker count starts gunicorn with
+gunicorn.conf.py and wsgi.py and drives it from client processes for
+--duration seconds. Scaling tops out at the number of cores, and the client
+processes share those cores with the server.
+
+    python -m benchmarks.load --workers 1 2 4 --clients 16
+    python -m benchmarks.load --cache-type NullCache --output load.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed(database_url, args):
+    env = dict(os.environ, TEST_DATABASE_URL=database_url)
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.data"]
+        + ["--venues", str(args.venues), "--artists", str(args.artists)]
+        + ["--shows", str(args.shows)],
+        env=env,
+        check=True,
+    )
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not come up")
+
+
+def client(port, paths, duration, seed):
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            urllib.request.urlopen(
+                f"http://127.0.0.1:{port}{rng.choice(paths)}", timeout=30
+            ).read()
+        except OSError:
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, errors
+
+
+def run(workers, args, env):
+    port = free_port()
+    server = subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        env=dict(env, WEB_CONCURRENCY=str(workers), PORT=str(port)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(port)
+        paths = [f"/venues/{i}" for i in range(1, args.venues + 1)]
+        paths += [f"/artists/{i}" for i in range(1, args.artists + 1)]
+        paths += ["/venues", "/artists", "/shows"]
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.starmap(
+                client, [(port, paths, args.duration, n) for n in range(args.clients)]
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = [ms for result, _ in results for ms in result]
+    return {
+        "workers": workers,
+        "requests_per_second": round(len(latencies) / args.duration, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(statistics.quantiles(latencies, n=100)[94], 2),
+        "errors": sum(errors for _, errors in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--cache-type", default="SimpleCache")
+    parser.add_argument("--venues", type=int, default=500)
+    parser.add_argument("--artists", type=int, default=2000)
+    parser.add_argument("--shows", type=int, default=50000)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+    cores = multiprocessing.cpu_count()
+    worker_counts = args.workers or sorted({1, 2, 4, cores, 2 * cores})
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'fyyur.db')}"
+        seed(database_url, args)
+        env = dict(
+            os.environ,
+            FYYUR_CONFIG="config.ProductionConfig",
+            DATABASE_URL=database_url,
+            CACHE_TYPE=args.cache_type,
+            GUNICORN_THREADS=str(args.threads),
+        )
+        results = []
+        for workers in worker_counts:
+            result = run(workers, args, env)
+            result["speedup"] = round(
+                result["requests_per_second"]
+                / (results[0] if results else result)["requests_per_second"],
+                2,
+            )
+            results.append(result)
+            print(result, file=sys.stderr)
+
+    output = json.dumps({"cores": cores, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Measure connection pool wait time under many concurrent clients.
+
+Every client thread checks out a connection, holds it for --hold-ms (a
+pg_sleep on Postgres) and returns it, as a request would. Pool wait is the
+time spent in engine.connect(); clients that wait past the pool timeout
+count as timeouts. Run it for a few pool sizes to pick one:
+
+    TEST_DATABASE_URL=postgresql://localhost/fyyur_bench python -m benchmarks.pool \\
+        --clients 200 --pool 5:10 --pool 10:20 --pool 20:40
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import QueuePool
+
+from config import engine_options
+
+
+def client(engine, hold, requests, waits, errors):
+    for _ in range(requests):
+        started = time.perf_counter()
+        try:
+            conn = engine.connect()
+        except exc.TimeoutError:
+            errors.append("timeout")
+            continue
+        waits.append((time.perf_counter() - started) * 1000)
+        try:
+            if engine.dialect.name == "postgresql":
+                conn.execute("SELECT pg_sleep(%s)", (hold,))
+            else:
+                conn.execute("SELECT 1")
+                time.sleep(hold)
+        finally:
+            conn.close()
+
+
+def run(uri, pool_size, max_overflow, args):
+    options = engine_options(
+        uri,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=args.pool_timeout,
+        pool_recycle=1800,
+        statement_timeout=30000,
+    )
+    if uri.startswith("sqlite"):
+        # SQLite files are not pooled by default, pool them to compare sizes
+        options = dict(
+            poolclass=QueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=args.pool_timeout,
+            connect_args={"check_same_thread": False},
+        )
+    engine = create_engine(uri, **options)
+    waits, errors = [], []
+    threads = [
+        threading.Thread(
+            target=client,
+            args=(engine, args.hold_ms / 1000, args.requests, waits, errors),
+        )
+        for _ in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "clients": args.clients,
+        "requests_per_second": round(len(waits) / elapsed, 1),
+        "wait_p50_ms": round(statistics.median(waits), 2),
+        "wait_p95_ms": round(statistics.quantiles(waits, n=100)[94], 2),
+        "wait_max_ms": round(max(waits), 2),
+        "timeouts": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="Per client.")
+    parser.add_argument("--hold-ms", type=float, default=10)
+    parser.add_argument("--pool-timeout", type=float, default=30)
+    parser.add_argument(
+        "--pool",
+        action="append",
+        help="pool_size:max_overflow, may be repeated (default 5:10).",
+    )
+    args = parser.parse_args()
+
+    uri = os.environ.get("TEST_DATABASE_URL")
+    with tempfile.TemporaryDirectory() as directory:
+        uri = uri or f"sqlite:///{os.path.join(directory, 'pool.db')}"
+        results = []
+        for pool in args.pool or ["5:10"]:
+            pool_size, max_overflow = (int(n) for n in pool.split(":"))
+            results.append(run(uri, pool_size, max_overflow, args))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Show query plans and timings of the hot-path queries before and after the
+indexes added in migration 575bf54af3c7.
+
+    python -m benchmarks.query_plans --shows 200000
+    TEST_DATABASE_URL=postgresql://localhost/fyyur_bench python -m benchmarks.query_plans
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app import create_app
+from benchmarks.data import generate
+from database import db
+from models.models import Show, Venue
+
+HOT_PATH_INDEXES = (
+    "ix_shows_venue_id_start_time",
+    "ix_shows_artist_id_start_time",
+    "ix_venue_city_state",
+    "ix_venue_name_address",
+)
+
+
+def hot_queries(now):
+    venue = Venue.query.get(42)
+    return {
+        "venue upcoming shows": Show.query.filter(Show.venue_id == 42).filter(
+            Show.start_time > now
+        ),
+        "artist upcoming shows": Show.query.filter(Show.artist_id == 42).filter(
+            Show.start_time > now
+        ),
+        "venues in area": Venue.query.filter_by(city=venue.city, state=venue.state),
+        "duplicate venue": Venue.query.filter_by(
+            name=venue.name, address=venue.address
+        ),
+    }
+
+
+def explain(query):
+    # capture the statement as sent to the driver and explain it verbatim
+    executed = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        query.all()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+
+    statement, parameters = executed[-1]
+    if db.engine.dialect.name == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+    cursor = db.session.connection().connection.cursor()
+    cursor.execute(prefix + statement, parameters)
+    return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+
+
+def timed(query, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query.all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def report(label, repeat):
+    print(f"\n=== {label}")
+    for name, query in hot_queries(datetime.now()).items():
+        print(f"\n{name}: {timed(query, repeat):.2f} ms (median of {repeat})")
+        for line in explain(query):
+            print(f"    {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--venues", type=int, default=10000)
+    parser.add_argument("--artists", type=int, default=20000)
+    parser.add_argument("--shows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app("config.TestingConfig")
+    with app.app_context():
+        indexes = [
+            index
+            for table in (Show.__table__, Venue.__table__)
+            for index in table.indexes
+            if index.name in HOT_PATH_INDEXES
+        ]
+        for index in indexes:
+            index.drop(db.engine)
+
+        generate(args.venues, args.artists, args.shows, args.seed)
+        report("before", args.repeat)
+
+        for index in indexes:
+            index.create(db.engine)
+        db.session.execute("ANALYZE")
+        report("after", args.repeat)
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Measure cold import plus create_app() time against a budget.
+
+Every sample runs in a fresh interpreter, like a newly booted worker. The exit
+status is 1 when the median total exceeds --budget-ms.
+
+    python -m benchmarks.startup --budget-ms 500
+    python -X importtime -c "import app" 2>&1 | sort -t'|' -k2 -n | tail
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app({config!r})
+created = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+}}))
+"""
+
+
+def sample(config):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(config=config)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="config.DevelopmentConfig")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=500)
+    args = parser.parse_args()
+
+    samples = [sample(args.config) for _ in range(args.repeat)]
+    results = {
+        name: round(statistics.median(s[name] for s in samples), 1)
+        for name in ("import_ms", "create_app_ms")
+    }
+    results["total_ms"] = round(
+        statistics.median(s["import_ms"] + s["create_app_ms"] for s in samples), 1
+    )
+    results["budget_ms"] = args.budget_ms
+    print(json.dumps(results, indent=2))
+    if results["total_ms"] > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Benchmark every view through the Flask test client on seeded data.
+
+Each view reports p50/p95 latency, queries per request and peak Python memory
+as JSON. Page and search caches are cleared before every request unless
+--warm is given, so the numbers are those of a cache miss. Pass --compare
+with an earlier run to flag regressions; the exit status is then 1 if any.
+create_show is skipped on SQLite, which cannot bind the string start time the
+view passes through from the form, so it would only measure the error path.
+
+    python -m benchmarks.views --output before.json
+    python -m benchmarks.views --compare before.json
+    TEST_DATABASE_URL=postgresql://localhost/fyyur_bench python -m benchmarks.views \\
+        --venues 10000 --artists 50000 --shows 1000000
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from itertools import count
+
+from flask import current_app
+
+from app import create_app
+from benchmarks.data import generate
+from database import db
+from utils.caching import cache
+from utils.querystats import collect
+
+_unique = count()
+
+
+def _venue_form(rng):
+    return {
+        "name": f"Bench Venue {next(_unique)}",
+        "city": "Chicago",
+        "state": "IL",
+        "address": f"{rng.randint(1, 9999)} Bench St",
+        "phone": "312-555-0100",
+        "genres": ["Jazz", "Blues"],
+        "facebook_link": "https://www.facebook.com/bench",
+    }
+
+
+def _artist_form(rng):
+    return {
+        "name": f"Bench Artist {next(_unique)}",
+        "city": "Chicago",
+        "state": "IL",
+        "phone": "312-555-0100",
+        "genres": ["Jazz"],
+        "facebook_link": "https://www.facebook.com/bench",
+        "image_link": "",
+        "website_link": "",
+        "seeking_description": "",
+    }
+
+
+def views(args, rng):
+    """Return ``{name: callable returning (method, path, form data)}``."""
+
+    def venue():
+        return rng.randint(1, args.venues)
+
+    def artist():
+        return rng.randint(1, args.artists)
+
+    def term():
+        return rng.choice(["hall", "the room", "chicago", "jazz", "artist 1"])
+
+    start_time = datetime.now() + timedelta(days=30)
+    cases = {
+        "index": lambda: ("GET", "/", None),
+        "venues": lambda: ("GET", "/venues", None),
+        "show_venue": lambda: ("GET", f"/venues/{venue()}", None),
+        "search_venues": lambda: ("POST", "/venues/search", {"search_term": term()}),
+        "artists": lambda: ("GET", "/artists", None),
+        "show_artist": lambda: ("GET", f"/artists/{artist()}", None),
+        "search_artists": lambda: ("POST", "/artists/search", {"search_term": term()}),
+        "shows": lambda: ("GET", "/shows", None),
+        "create_venue_form": lambda: ("GET", "/venues/create", None),
+        "create_venue": lambda: ("POST", "/venues/create", _venue_form(rng)),
+        "create_artist_form": lambda: ("GET", "/artists/create", None),
+        "create_artist": lambda: ("POST", "/artists/create", _artist_form(rng)),
+        "create_show_form": lambda: ("GET", "/shows/create", None),
+        "create_show": lambda: (
+            "POST",
+            "/shows/create",
+            {
+                "venue_id": venue(),
+                "artist_id": artist(),
+                "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
+            },
+        ),
+    }
+    if db.engine.dialect.name == "sqlite":
+        del cases["create_show"]
+    return cases
+
+
+def _clear_caches():
+    cache.clear()
+    if "search_results" in current_app.extensions:
+        current_app.extensions["search_results"].clear()
+
+
+def benchmark(client, request, repeat, warm):
+    latencies, queries = [], []
+    method, path, data = request()
+    client.open(path, method=method, data=data)
+    for _ in range(repeat):
+        method, path, data = request()
+        if not warm:
+            _clear_caches()
+        with collect() as stats:
+            started = time.perf_counter()
+            client.open(path, method=method, data=data)
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(stats.count)
+
+    method, path, data = request()
+    if not warm:
+        _clear_caches()
+    tracemalloc.start()
+    client.open(path, method=method, data=data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(percentiles[94], 3),
+        "queries": statistics.median(queries),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(baseline, results, tolerance):
+    """Print the change from ``baseline`` and return the regressed views."""
+    regressions = []
+    for name, now in results["views"].items():
+        before = baseline["views"].get(name)
+        if before is None:
+            continue
+        slower = now["p95_ms"] > before["p95_ms"] * (1 + tolerance)
+        more_queries = now["queries"] > before["queries"]
+        if slower or more_queries:
+            regressions.append(name)
+        print(
+            f"{name:20} p95 {before['p95_ms']:9.2f} -> {now['p95_ms']:9.2f} ms"
+            f"  queries {before['queries']:5g} -> {now['queries']:5g}"
+            f"{'  REGRESSION' if slower or more_queries else ''}",
+            file=sys.stderr,
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--venues", type=int, default=1000)
+    parser.add_argument("--artists", type=int, default=5000)
+    parser.add_argument("--shows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--view", action="append", help="Only benchmark this view.")
+    parser.add_argument("--warm", action="store_true", help="Keep the caches warm.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="JSON results of an earlier run.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    app = create_app("config.TestingConfig")
+    app.config["WTF_CSRF_ENABLED"] = False
+    with app.app_context():
+        generate(args.venues, args.artists, args.shows, args.seed)
+        rng = random.Random(args.seed)
+        client = app.test_client()
+        results = {
+            "meta": {
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "database": db.engine.dialect.name,
+                **{
+                    name: getattr(args, name)
+                    for name in ("venues", "artists", "shows", "repeat", "seed", "warm")
+                },
+            },
+            "views": {},
+        }
+        for name, request in views(args, rng).items():
+            if args.view and name not in args.view:
+                continue
+            results["views"][name] = benchmark(client, request, args.repeat, args.warm)
+            print(name, results["views"][name], file=sys.stderr)
+
+        db.session.remove()
+        db.drop_all()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
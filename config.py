@@ -1,6 +1,8 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
+from sqlalchemy.pool import NullPool
 
 SECRET_KEY = os.urandom(32)
 
@@ -11,16 +13,140 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, ".env"))
 
 
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def engine_options(
+    uri,
+    pool_size,
+    max_overflow,
+    pool_timeout,
+    pool_recycle,
+    statement_timeout=None,
+    pgbouncer=False,
+):
+    """Return SQLALCHEMY_ENGINE_OPTIONS for the database at ``uri``.
+
+    ``statement_timeout`` is in milliseconds. In ``pgbouncer`` mode PgBouncer
+    does the pooling and, in transaction mode, cannot pass startup options or
+    keep prepared statements, so connections are not pooled here and the
+    timeout is set per transaction instead, see database.init_app. psycopg2
+    never prepares statements server side, so it needs nothing more.
+    """
+    if not uri or uri.startswith("sqlite"):
+        return {}
+
+    options = {"pool_pre_ping": True, "pool_recycle": pool_recycle}
+    connect_args = {}
+    if pgbouncer:
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout
+        )
+        if statement_timeout and uri.startswith("postgres"):
+            connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
 class Config(object):
     # ...
     SECRET_KEY = SECRET_KEY
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # read-only views query the replica, see database.read_replica
+    SQLALCHEMY_BINDS = (
+        {"replica": os.environ["REPLICA_DATABASE_URL"]}
+        if os.environ.get("REPLICA_DATABASE_URL")
+        else None
+    )
+    # longer than the replication lag, see database.read_replica
+    REPLICA_PIN_SECONDS = _env_int("REPLICA_PIN_SECONDS", 5)
+    # milliseconds, 0 disables it
+    DB_STATEMENT_TIMEOUT = _env_int("DB_STATEMENT_TIMEOUT", 30000)
+    # PgBouncer in transaction pooling mode in front of Postgres
+    DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "") in ("1", "true", "yes")
+    # pools are per worker process, size them with gunicorn's workers and
+    # threads against the server's max_connections
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI,
+        pool_size=_env_int("DB_POOL_SIZE", 5),
+        max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+        pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+        pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+        statement_timeout=DB_STATEMENT_TIMEOUT,
+        pgbouncer=DB_PGBOUNCER,
+    )
     TESTING = False
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    STREAM_BATCH_SIZE = 1000
+    # statements run more often than this in one request are logged as N+1
+    QUERY_REPEAT_THRESHOLD = 5
+    # statements slower than this many seconds go to the slow query log, see
+    # utils.slowlog; a sample of them also gets its plan captured
+    SLOW_QUERY_THRESHOLD = float(os.environ.get("SLOW_QUERY_THRESHOLD", 0.5))
+    SLOW_QUERY_EXPLAIN_RATE = float(os.environ.get("SLOW_QUERY_EXPLAIN_RATE", 0.1))
+    SLOW_QUERY_LOG = os.path.join(basedir, "slow_queries.log")
+    # rotated files, SLOW_QUERY_LOG.1 and so on, read by ``flask slow-queries``
+    SLOW_QUERY_LOG_BACKUPS = 5
+    # fraction of requests run under cProfile, see utils.profiling
+    PROFILE_RATE = float(os.environ.get("PROFILE_RATE", 0))
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(basedir, "profiles"))
+    PROFILE_HEADER = "X-Fyyur-Profile"
+    PROFILE_SECRET = os.environ.get("PROFILE_SECRET")
+
+    # cached pages are purged on write, see utils.invalidation, and detail
+    # pages expire at their next show, see utils.caching.expire_at
+    CACHE_DEFAULT_TIMEOUT = 6 * 60 * 60
+    # expired pages are served for this long while one request rebuilds them,
+    # see utils.caching.coalesced
+    CACHE_STALE_TIMEOUT = 5 * 60
+    CACHE_LOCK_TIMEOUT = 30
+    CACHE_TYPE = os.environ.get("CACHE_TYPE", "SimpleCache")
+    CACHE_KEY_PREFIX = os.environ.get("CACHE_KEY_PREFIX", "fyyur:")
+    # RedisCache
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    # MemcachedCache
+    CACHE_MEMCACHED_SERVERS = os.environ.get(
+        "CACHE_MEMCACHED_SERVERS", "127.0.0.1:11211"
+    ).split(",")
+    # FileSystemCache, shared by every worker on the host
+    CACHE_DIR = os.environ.get(
+        "CACHE_DIR", os.path.join(tempfile.gettempdir(), "fyyur-cache")
+    )
+    CACHE_THRESHOLD = int(os.environ.get("CACHE_THRESHOLD", 10000))
+    # bearer tokens of the partners allowed to use /export, which is off
+    # while there are none
+    EXPORT_TOKENS = [
+        token for token in os.environ.get("EXPORT_TOKENS", "").split(",") if token
+    ]
+    # bearer token of the Prometheus scraper, /metrics is off without one
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+    SEARCH_RESULTS_LIMIT = 50
+    # per-process cache of search results keyed on the normalized term
+    SEARCH_CACHE_SIZE = 1024
+    SEARCH_CACHE_TTL = 300
 
 
 class ProductionConfig(Config):
     DEBUG = False
+    # every gunicorn worker has to see the same cache, a per-process
+    # SimpleCache would warm and miss independently
+    CACHE_TYPE = os.environ.get("CACHE_TYPE", "RedisCache")
+    # fail fast at peak rather than queue requests behind an exhausted pool
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        Config.SQLALCHEMY_DATABASE_URI,
+        pool_size=_env_int("DB_POOL_SIZE", 10),
+        max_overflow=_env_int("DB_MAX_OVERFLOW", 20),
+        pool_timeout=_env_int("DB_POOL_TIMEOUT", 5),
+        pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+        statement_timeout=Config.DB_STATEMENT_TIMEOUT,
+        pgbouncer=Config.DB_PGBOUNCER,
+    )
 
 
 class DevelopmentConfig(Config):
@@ -30,7 +156,21 @@ class DevelopmentConfig(Config):
 
 
 class TestingConfig(Config):
-    SQLALCHEMY_DATABASE_URI = os.environ.get("TEST_DATABASE_URL")
+    SQLALCHEMY_DATABASE_URI = os.environ.get("TEST_DATABASE_URL", "sqlite://")
+    SQLALCHEMY_BINDS = (
+        {"replica": os.environ["TEST_REPLICA_DATABASE_URL"]}
+        if os.environ.get("TEST_REPLICA_DATABASE_URL")
+        else None
+    )
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI,
+        pool_size=5,
+        max_overflow=5,
+        pool_timeout=10,
+        pool_recycle=1800,
+        statement_timeout=Config.DB_STATEMENT_TIMEOUT,
+    )
     TESTING = True
     DEBUG = True
     ENV = "testing"
+    CACHE_TYPE = "SimpleCache"
@@ -1,9 +1,141 @@
-from flask_sqlalchemy import SQLAlchemy
+import functools
+import time
+from datetime import datetime, timedelta
 
+import click
+from flask import current_app, g, has_app_context, has_request_context, session
+from flask.cli import with_appcontext
+from flask_sqlalchemy import SignallingSession, SQLAlchemy, get_state
+from sqlalchemy import event, orm
+from sqlalchemy.engine import Engine
 
-db = SQLAlchemy()
+from utils import querystats, slowlog
+from utils.caching import cache, expire_at
+
+# *----------------------------------------------------------------------------#
+# * Read replica routing
+# *----------------------------------------------------------------------------#
+# With a "replica" bind in SQLALCHEMY_BINDS, the views wrapped in
+# ``read_replica`` run their queries on the replica. Everything else, every
+# flush, and a session's reads after its own flush stay on the primary. The
+# choice is made once per request. After a committed write the writing client
+# reads from the primary for REPLICA_PIN_SECONDS, by a timestamp in its session
+# cookie, so that it reads its own writes, and bypasses the page cache, which
+# other clients fill from the replica. Pages other clients rebuild from the
+# replica in that window may predate the write and are only cached for the
+# same time; search results and indexes are not cached at all.
+
+REPLICA = "replica"
+# session key, the time until which the client reads from the primary
+PINNED_UNTIL = "primary_until"
+# cache key, set for REPLICA_PIN_SECONDS after any committed write
+RECENT_WRITE = "replica/recent-write"
+
+
+def read_replica(f):
+    """Run the queries of a read-only view on the replica, if configured."""
+
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.read_replica = _replica_configured(current_app) and not pinned_to_primary()
+        g.replica_lagging = g.read_replica and bool(cache.get(RECENT_WRITE))
+        if g.replica_lagging:
+            seconds = current_app.config["REPLICA_PIN_SECONDS"]
+            expire_at(datetime.now() + timedelta(seconds=seconds))
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def pinned_to_primary():
+    """Return whether the client reads from the primary after its own write.
+
+    Its pages must then not come from the cache, see ``coalesced``'s
+    ``unless``.
+    """
+    return (
+        _replica_configured(current_app) and session.get(PINNED_UNTIL, 0) >= time.time()
+    )
+
+
+def replica_lagging():
+    """Return whether this request reads from a replica that may not have
+    replicated the latest write yet."""
+    return has_request_context() and g.get("replica_lagging", False)
+
+
+def _replica_configured(app):
+    return REPLICA in (app.config.get("SQLALCHEMY_BINDS") or {})
+
+
+class RoutingSession(SignallingSession):
+    def get_bind(self, mapper=None, clause=None):
+        if self._use_replica():
+            return get_state(self.app).db.get_engine(self.app, bind=REPLICA)
+        return super().get_bind(mapper, clause)
+
+    def _use_replica(self):
+        return (
+            has_request_context()
+            and g.get("read_replica", False)
+            and not self._flushing
+            and not self.info.get("wrote")
+        )
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = RoutingSQLAlchemy()
+
+
+def engines(app):
+    """Return ``{bind: engine}`` for the default database (``None``) and every
+    bind in SQLALCHEMY_BINDS, the replica included."""
+    binds = [None, *(app.config.get("SQLALCHEMY_BINDS") or {})]
+    return {bind: db.get_engine(app, bind=bind) for bind in binds}
+
+
+def _mark_write(db_session, flush_context):
+    db_session.info["wrote"] = True
+
+
+def _pin_primary(db_session):
+    if not db_session.info.get("wrote") or not has_app_context():
+        return
+    if _replica_configured(current_app):
+        seconds = current_app.config["REPLICA_PIN_SECONDS"]
+        if has_request_context():
+            session[PINNED_UNTIL] = time.time() + seconds
+        cache.set(RECENT_WRITE, True, timeout=seconds)
+
+
+def _set_statement_timeout(conn):
+    # behind PgBouncer a session SET would leak to other clients' transactions
+    if not has_app_context() or not current_app.config["DB_PGBOUNCER"]:
+        return
+    timeout = current_app.config["DB_STATEMENT_TIMEOUT"]
+    if timeout and conn.dialect.name == "postgresql":
+        conn.execute(f"SET LOCAL statement_timeout = {int(timeout)}")
 
 
 def init_app(app):
     db.init_app(app)
-    db.create_all(app=app)
+    querystats.init_app(app)
+    slowlog.init_app(app)
+    if not event.contains(Engine, "begin", _set_statement_timeout):
+        event.listen(Engine, "begin", _set_statement_timeout)
+    if not event.contains(RoutingSession, "after_flush", _mark_write):
+        event.listen(RoutingSession, "after_flush", _mark_write)
+        event.listen(RoutingSession, "after_commit", _pin_primary)
+    app.cli.add_command(init_db_command)
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db_command():
+    """Create the tables of a new database, see ``flask db upgrade`` otherwise."""
+    db.create_all()
+    click.echo("Initialized the database.")
@@ -15,6 +15,12 @@ from wtforms.validators import URL, DataRequired
 from enums import Genres, States
 from models.models import Venue
 
+# choice lists are built once at import rather than per form or per validation
+STATE_CHOICES = States.choices()
+GENRE_CHOICES = Genres.choices()
+STATES = frozenset(name for name, _ in STATE_CHOICES)
+GENRES = frozenset(name for name, _ in GENRE_CHOICES)
+
 
 def validate_phone(phone):
     # regex for phone number validation
@@ -25,9 +31,10 @@ def validate_phone(phone):
 
 # check if venue and anddress already exists in the database
 def validate_new_venue(form, field):
-    if venue := Venue.query.filter_by(name=form.name.data).first():
-        if venue.address == form.address.data:
-            return True
+    venue = Venue.query.filter_by(
+        name=form.name.data, address=form.address.data
+    ).first()
+    return venue is not None
 
 
 class ShowForm(Form):
@@ -42,13 +49,13 @@ class VenueForm(Form):
     name = StringField("name", validators=[DataRequired()])
     city = StringField("city", validators=[DataRequired()])
     state = SelectField(
-        "state", validators=[DataRequired()], choices=States.choices(), coerce=str
+        "state", validators=[DataRequired()], choices=STATE_CHOICES, coerce=str
     )
     address = StringField("address", validators=[DataRequired()])
     phone = StringField("phone")
     image_link = StringField("image_link")
     genres = SelectMultipleField(
-        "genres", validators=[DataRequired()], choices=Genres.choices(), coerce=str
+        "genres", validators=[DataRequired()], choices=GENRE_CHOICES, coerce=str
     )
     facebook_link = StringField("facebook_link", validators=[URL()])
     website_link = StringField("website_link")
@@ -70,13 +77,13 @@ class VenueForm(Form):
             self.name.errors.append("Venue already exists")
             return False
 
-        if self.state.data not in dict(States.choices()).keys():
+        if self.state.data not in STATES:
             flash("Invalid state")
             self.state.errors.append("Invalid state")
             return False
 
         for genre in self.genres.data:
-            if genre not in dict(Genres.choices()).keys():
+            if genre not in GENRES:
                 flash("Invalid genre")
                 self.genres.errors.append("Invalid genre")
 
@@ -88,7 +95,7 @@ class ArtistForm(Form):
     name = StringField("name", validators=[DataRequired()])
     city = StringField("city", validators=[DataRequired()])
     state = SelectField(
-        "state", validators=[DataRequired()], choices=States.choices(), coerce=str
+        "state", validators=[DataRequired()], choices=STATE_CHOICES, coerce=str
     )
     phone = StringField(
         "phone",
@@ -96,7 +103,7 @@ class ArtistForm(Form):
     )
     image_link = StringField("image_link")
     genres = SelectMultipleField(
-        "genres", validators=[DataRequired()], choices=Genres.choices(), coerce=str
+        "genres", validators=[DataRequired()], choices=GENRE_CHOICES, coerce=str
     )
     facebook_link = StringField(
         "facebook_link",
@@ -118,13 +125,13 @@ class ArtistForm(Form):
             self.phone.errors.append("Invalid phone number")
             return False
 
-        if self.state.data not in dict(States.choices()).keys():
+        if self.state.data not in STATES:
             flash("Invalid state")
             self.state.errors.append("Invalid state")
             return False
 
         for genre in self.genres.data:
-            if genre not in dict(Genres.choices()).keys():
+            if genre not in GENRES:
                 flash("Invalid genre")
                 self.genres.errors.append("Invalid genre")
                 return False
@@ -0,0 +1,46 @@
+import multiprocessing
+import os
+
+# *----------------------------------------------------------------------------#
+# * Gunicorn
+# *----------------------------------------------------------------------------#
+# The app is imported once in the master and forked into the workers, which
+# share its memory copy-on-write and boot without importing anything. Every
+# setting can be overridden from the environment.
+#
+# Reloading: with preload_app the master holds the old code, so HUP only
+# restarts workers. To deploy new code without dropping requests, send USR2
+# to start a new master next to the old one, then QUIT the old master.
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 2))
+worker_class = "gthread" if threads > 1 else "sync"
+preload_app = True
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+# recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # connections opened in the master (none normally, but an import-time
+    # query would do it) must not be shared by the forked workers, on the
+    # primary or on any bind such as the replica
+    from database import engines
+
+    for engine in engines(server.app.wsgi()).values():
+        engine.dispose()
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
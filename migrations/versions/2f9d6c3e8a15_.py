@@ -0,0 +1,54 @@
+"""add show counters to Venue and Artist
+
+Revision ID: 2f9d6c3e8a15
+Revises: 8e5b1f0c6a47
+Create Date: 2026-10-18 16:40:12.337291
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "2f9d6c3e8a15"
+down_revision = "8e5b1f0c6a47"
+branch_labels = None
+depends_on = None
+
+OWNERS = (("Venue", "venue_id"), ("Artist", "artist_id"))
+
+
+def upgrade():
+    for table, key in OWNERS:
+        for column in ("upcoming_shows_count", "past_shows_count"):
+            op.add_column(
+                table,
+                sa.Column(column, sa.Integer(), nullable=False, server_default="0"),
+            )
+        op.add_column(table, sa.Column("next_show_at", sa.DateTime(), nullable=True))
+        op.create_index(f"ix_{table}_next_show_at", table, ["next_show_at"])
+
+        # the same recount as `flask reconcile-show-counts --all`
+        op.execute(
+            sa.text(
+                f"""
+                UPDATE "{table}" SET
+                upcoming_shows_count = (SELECT count(*) FROM "Shows"
+                    WHERE {key} = "{table}".id AND start_time > :now),
+                past_shows_count = (SELECT count(*) FROM "Shows"
+                    WHERE {key} = "{table}".id AND start_time <= :now),
+                next_show_at = (SELECT min(start_time) FROM "Shows"
+                    WHERE {key} = "{table}".id AND start_time > :now)
+                """
+            ).bindparams(now=datetime.now())
+        )
+
+
+def downgrade():
+    for table, _ in reversed(OWNERS):
+        op.drop_index(f"ix_{table}_next_show_at", table_name=table)
+        op.drop_column(table, "next_show_at")
+        op.drop_column(table, "past_shows_count")
+        op.drop_column(table, "upcoming_shows_count")
@@ -0,0 +1,34 @@
+"""add hot-path indexes on Shows and Venue
+
+Revision ID: 575bf54af3c7
+Revises: a832904c02ff
+Create Date: 2026-10-18 10:03:27.561904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "575bf54af3c7"
+down_revision = "a832904c02ff"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_shows_venue_id_start_time", "Shows", ["venue_id", "start_time"])
+    op.create_index(
+        "ix_shows_artist_id_start_time", "Shows", ["artist_id", "start_time"]
+    )
+    op.create_index("ix_venue_city_state", "Venue", ["city", "state"])
+    # fails if duplicate venues were listed before VenueForm rejected them,
+    # those rows have to be merged by hand first
+    op.create_index("ix_venue_name_address", "Venue", ["name", "address"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_venue_name_address", table_name="Venue")
+    op.drop_index("ix_venue_city_state", table_name="Venue")
+    op.drop_index("ix_shows_artist_id_start_time", table_name="Shows")
+    op.drop_index("ix_shows_venue_id_start_time", table_name="Shows")
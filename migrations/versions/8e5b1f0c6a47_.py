@@ -0,0 +1,87 @@
+"""add Genre table and genre links for venues and artists
+
+Revision ID: 8e5b1f0c6a47
+Revises: d41c7a9e3b52
+Create Date: 2026-10-18 15:02:44.918306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from enums import Genres
+
+
+# revision identifiers, used by Alembic.
+revision = "8e5b1f0c6a47"
+down_revision = "d41c7a9e3b52"
+branch_labels = None
+depends_on = None
+
+LINKS = (("VenueGenres", "Venue"), ("ArtistGenres", "Artist"))
+BATCH_SIZE = 10000
+
+
+def _names(genres):
+    # the genres column holds array literals like {Jazz,"Hip-Hop"} or a bare
+    # name, with enum names and values mixed
+    lookup = {
+        key.lower(): genre.value
+        for genre in Genres
+        for key in (genre.name, genre.value)
+    }
+    names = (
+        lookup.get(g.strip().strip('"').lower()) for g in genres.strip("{}").split(",")
+    )
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def upgrade():
+    genre = op.create_table(
+        "Genre",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.bulk_insert(genre, [{"name": g.value} for g in Genres])
+
+    connection = op.get_bind()
+    ids = dict(connection.execute(sa.text('SELECT name, id FROM "Genre"')).fetchall())
+    for name, owner in LINKS:
+        key = f"{owner.lower()}_id"
+        links = op.create_table(
+            name,
+            sa.Column(key, sa.Integer(), nullable=False),
+            sa.Column("genre_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint([key], [f"{owner}.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["genre_id"], ["Genre.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint(key, "genre_id"),
+        )
+        op.alter_column(owner, "genres", type_=sa.Text())
+
+        # backfill from the genres column, a batch of owners at a time
+        rows = connection.execute(
+            sa.text(f'SELECT id, genres FROM "{owner}" WHERE genres IS NOT NULL')
+        )
+        while True:
+            batch = rows.fetchmany(BATCH_SIZE)
+            if not batch:
+                break
+            values = [
+                {key: id, "genre_id": ids[genre]}
+                for id, genres in batch
+                for genre in _names(genres)
+            ]
+            if values:
+                op.bulk_insert(links, values)
+
+        # created after the backfill, which is faster than maintaining it
+        op.create_index(f"ix_{name.lower()}_genre_id", name, ["genre_id", key])
+
+
+def downgrade():
+    for name, owner in reversed(LINKS):
+        op.drop_index(f"ix_{name.lower()}_genre_id", table_name=name)
+        op.drop_table(name)
+        op.alter_column(owner, "genres", type_=sa.String(length=120))
+    op.drop_table("Genre")
@@ -0,0 +1,54 @@
+"""add search_text columns and trigram search indexes
+
+Revision ID: a832904c02ff
+Revises: bffe54bbd08d
+Create Date: 2026-10-18 09:12:40.113254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a832904c02ff"
+down_revision = "bffe54bbd08d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("Venue", sa.Column("search_text", sa.Text(), nullable=True))
+    op.add_column("Artist", sa.Column("search_text", sa.Text(), nullable=True))
+
+    # backfill, new and edited rows are kept up to date by the ORM
+    for table in ("Venue", "Artist"):
+        op.execute(
+            f'UPDATE "{table}" SET search_text = lower('
+            "coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || "
+            "coalesce(state, '') || ' ' || coalesce(genres, ''))"
+        )
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_venue_search_text_trgm",
+            "Venue",
+            ["search_text"],
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        )
+        op.create_index(
+            "ix_artist_search_text_trgm",
+            "Artist",
+            ["search_text"],
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_artist_search_text_trgm", table_name="Artist")
+        op.drop_index("ix_venue_search_text_trgm", table_name="Venue")
+    op.drop_column("Artist", "search_text")
+    op.drop_column("Venue", "search_text")
@@ -0,0 +1,24 @@
+"""add the show calendar index on Shows (start_time, venue_id)
+
+Revision ID: c7a3e5d91f20
+Revises: 2f9d6c3e8a15
+Create Date: 2026-10-18 17:55:31.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c7a3e5d91f20"
+down_revision = "2f9d6c3e8a15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_shows_start_time_venue_id", "Shows", ["start_time", "venue_id"])
+
+
+def downgrade():
+    op.drop_index("ix_shows_start_time_venue_id", table_name="Shows")
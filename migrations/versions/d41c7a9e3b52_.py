@@ -0,0 +1,43 @@
+"""add updated_at columns to Venue, Artist and Shows
+
+Revision ID: d41c7a9e3b52
+Revises: 575bf54af3c7
+Create Date: 2026-10-18 14:21:09.482117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d41c7a9e3b52"
+down_revision = "575bf54af3c7"
+branch_labels = None
+depends_on = None
+
+TABLES = ("Venue", "Artist", "Shows")
+
+
+# the database's UTC time, see models.models.utc_now
+UTC_NOW = sa.text("TIMEZONE('utc', CURRENT_TIMESTAMP)")
+
+
+def upgrade():
+    for table in TABLES:
+        # existing rows are stamped with the migration time
+        op.add_column(
+            table,
+            sa.Column(
+                "updated_at",
+                sa.DateTime(),
+                nullable=False,
+                server_default=UTC_NOW,
+            ),
+        )
+        op.create_index(f"ix_{table}_updated_at", table, ["updated_at"])
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_index(f"ix_{table}_updated_at", table_name=table)
+        op.drop_column(table, "updated_at")
@@ -0,0 +1,30 @@
+"""make Venue.name and Artist.name NOT NULL
+
+Revision ID: e5f81b2c9d04
+Revises: c7a3e5d91f20
+Create Date: 2026-10-18 19:12:47.330521
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5f81b2c9d04"
+down_revision = "c7a3e5d91f20"
+branch_labels = None
+depends_on = None
+
+TABLES = ("Venue", "Artist")
+
+
+def upgrade():
+    for table in TABLES:
+        # a NULL name would sort outside every (name, id) page of the listings
+        op.execute(f"UPDATE \"{table}\" SET name = '' WHERE name IS NULL")
+        op.alter_column(table, "name", existing_type=sa.String(), nullable=False)
+
+
+def downgrade():
+    for table in TABLES:
+        op.alter_column(table, "name", existing_type=sa.String(), nullable=True)
@@ -1,25 +1,76 @@
+from datetime import datetime
+
+from sqlalchemy import DDL, and_, case, event, func, inspect, literal, or_, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
 from database import db
+from enums import Genres
+from utils.text import tokenize
 
 # *----------------------------------------------------------------------------#
 # * Models
 # *----------------------------------------------------------------------------#
 
 
+class utc_now(FunctionElement):
+    """The database's current UTC time, naive like the ``updated_at`` columns.
+
+    Every ``updated_at`` comes from the database clock, whether it is set by
+    the ORM, a bulk insert or COPY.
+    """
+
+    type = db.DateTime()
+
+
+@compiles(utc_now)
+def _utc_now_default(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is UTC but only to the second
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+@compiles(utc_now, "postgresql")
+def _utc_now_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
 class Venue(db.Model):
     __tablename__ = "Venue"
+    __table_args__ = (
+        db.Index("ix_venue_city_state", "city", "state"),
+        db.Index("ix_venue_name_address", "name", "address", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
+    # NOT NULL, the listings page on (name, id), see services.pagination
+    name = db.Column(db.String, nullable=False)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     address = db.Column(db.String(120))
     phone = db.Column(db.String(120))
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
+    # denormalized copy of the genre links below, for display and search_text
+    genres = db.Column(db.Text)
     website_link = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(500))
+    search_text = db.Column(db.Text)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        index=True,
+        onupdate=utc_now(),
+        server_default=utc_now(),
+    )
+    # kept in step by the Show counter events below and services.counters
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    next_show_at = db.Column(db.DateTime, index=True)
     shows = db.relationship("Show", backref="venue", lazy=True)
 
     def add(self):
@@ -71,16 +122,32 @@ class Artist(db.Model):
     __tablename__ = "Artist"
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
+    name = db.Column(db.String, nullable=False)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
+    genres = db.Column(db.Text)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website_link = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(500))
+    search_text = db.Column(db.Text)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        index=True,
+        onupdate=utc_now(),
+        server_default=utc_now(),
+    )
+    # kept in step by the Show counter events below and services.counters
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    next_show_at = db.Column(db.DateTime, index=True)
     shows = db.relationship("Show", backref="artist", lazy=True)
 
     def add(self):
@@ -128,11 +195,33 @@ class Artist(db.Model):
 
 class Show(db.Model):
     __tablename__ = "Shows"
+    __table_args__ = (
+        db.Index("ix_shows_venue_id_start_time", "venue_id", "start_time"),
+        db.Index("ix_shows_artist_id_start_time", "artist_id", "start_time"),
+        db.Index("ix_shows_start_time_venue_id", "start_time", "venue_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    artist_id = db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False)
-    venue_id = db.Column(db.Integer, db.ForeignKey("Venue.id"), nullable=False)
-    start_time = db.Column(db.DateTime, nullable=False)
+    # the old values are loaded on change, a moved show is uncounted from them,
+    # see recount_moved_show
+    artist_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False),
+        active_history=True,
+    )
+    venue_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey("Venue.id"), nullable=False),
+        active_history=True,
+    )
+    start_time = db.column_property(
+        db.Column(db.DateTime, nullable=False), active_history=True
+    )
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        index=True,
+        onupdate=utc_now(),
+        server_default=utc_now(),
+    )
 
     def add(self):
         db.session.add(self)
@@ -151,3 +240,279 @@ class Show(db.Model):
 
     def __str__(self):
         return f"{self.artist_id} {self.venue_id} {self.start_time}"
+
+
+class Genre(db.Model):
+    __tablename__ = "Genre"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"{self.name}"
+
+    def __str__(self):
+        return f"{self.name}"
+
+
+def _genre_links(name, owner):
+    # the primary key serves "genres of a venue", the index "venues of a genre"
+    return db.Table(
+        name,
+        db.Column(
+            f"{owner.lower()}_id",
+            db.Integer,
+            db.ForeignKey(f"{owner}.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        db.Column(
+            "genre_id",
+            db.Integer,
+            db.ForeignKey("Genre.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        db.Index(f"ix_{name.lower()}_genre_id", "genre_id", f"{owner.lower()}_id"),
+    )
+
+
+venue_genres = _genre_links("VenueGenres", "Venue")
+artist_genres = _genre_links("ArtistGenres", "Artist")
+
+
+# *----------------------------------------------------------------------------#
+# * Modification times
+# *----------------------------------------------------------------------------#
+
+
+def touch(connection, venue_ids=(), artist_ids=()):
+    """Bump ``updated_at`` of the given venues and artists."""
+    for model, ids in ((Venue, venue_ids), (Artist, artist_ids)):
+        ids = {id for id in ids if id is not None}
+        if ids:
+            connection.execute(
+                model.__table__.update()
+                .where(model.id.in_(ids))
+                .values(updated_at=utc_now())
+            )
+
+
+@event.listens_for(Show, "after_insert")
+@event.listens_for(Show, "after_update")
+@event.listens_for(Show, "after_delete")
+def touch_show_owners(mapper, connection, target):
+    # a venue or artist page lists its shows, so adding, moving or removing
+    # one modifies it; see the conditional GETs in api.py
+    venue_ids, artist_ids = {target.venue_id}, {target.artist_id}
+    for name, ids in (("venue_id", venue_ids), ("artist_id", artist_ids)):
+        ids.update(inspect(target).attrs[name].history.deleted)
+    touch(connection, venue_ids, artist_ids)
+
+
+# *----------------------------------------------------------------------------#
+# * Show counters
+# *----------------------------------------------------------------------------#
+# Venues and artists carry their upcoming and past show counts and the start
+# of their next show, so listings never count Shows rows. A show is counted as
+# upcoming while it starts at or after its owner's ``next_show_at``; the events
+# below adjust the counts in place as shows are added, moved and removed, and
+# ``flask reconcile-show-counts`` (services.counters) moves the shows that
+# have started since to the past.
+
+
+def _as_datetime(value):
+    # create_show hands the form's string straight to the model
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _count_show(connection, model, id, start_time, now):
+    table = model.__table__
+    next_show_at = table.c.next_show_at
+    start = literal(start_time, type_=db.DateTime)
+    if start_time > now:
+        upcoming = literal(True)
+        next_show_at = case(
+            [(or_(next_show_at.is_(None), start < next_show_at), start)],
+            else_=next_show_at,
+        )
+    else:
+        # a started show is still upcoming to an owner not reconciled yet
+        upcoming = and_(next_show_at.isnot(None), start >= next_show_at)
+    connection.execute(
+        table.update()
+        .where(table.c.id == id)
+        .values(
+            upcoming_shows_count=table.c.upcoming_shows_count
+            + case([(upcoming, 1)], else_=0),
+            past_shows_count=table.c.past_shows_count + case([(upcoming, 0)], else_=1),
+            next_show_at=next_show_at,
+        )
+    )
+
+
+def _uncount_show(connection, model, id, start_time, owner):
+    table = model.__table__
+    next_show_at = table.c.next_show_at
+    start = literal(start_time, type_=db.DateTime)
+    upcoming = and_(next_show_at.isnot(None), start >= next_show_at)
+    following = (
+        select([func.min(Show.start_time)])
+        .where(and_(owner == id, Show.start_time >= start))
+        .as_scalar()
+    )
+    connection.execute(
+        table.update()
+        .where(table.c.id == id)
+        .values(
+            upcoming_shows_count=table.c.upcoming_shows_count
+            - case([(upcoming, 1)], else_=0),
+            past_shows_count=table.c.past_shows_count - case([(upcoming, 0)], else_=1),
+            next_show_at=case([(next_show_at == start, following)], else_=next_show_at),
+        )
+    )
+
+
+OWNERS = ((Venue, "venue_id", Show.venue_id), (Artist, "artist_id", Show.artist_id))
+
+
+def _old(state, name):
+    history = state.attrs[name].history
+    return (history.deleted or history.unchanged or [None])[0]
+
+
+@event.listens_for(Show, "after_insert")
+def count_new_show(mapper, connection, target):
+    now = datetime.now()
+    for model, name, _ in OWNERS:
+        start_time = _as_datetime(target.start_time)
+        _count_show(connection, model, getattr(target, name), start_time, now)
+
+
+@event.listens_for(Show, "after_delete")
+def uncount_deleted_show(mapper, connection, target):
+    state = inspect(target)
+    for model, name, owner in OWNERS:
+        start_time = _as_datetime(_old(state, "start_time"))
+        _uncount_show(connection, model, _old(state, name), start_time, owner)
+
+
+@event.listens_for(Show, "after_update")
+def recount_moved_show(mapper, connection, target):
+    state = inspect(target)
+    names = ("start_time", "venue_id", "artist_id")
+    if not any(state.attrs[name].history.deleted for name in names):
+        return
+    uncount_deleted_show(mapper, connection, target)
+    count_new_show(mapper, connection, target)
+
+
+# *----------------------------------------------------------------------------#
+# * Genres
+# *----------------------------------------------------------------------------#
+# ``genres`` holds whatever the forms and importers wrote: a list, a Postgres
+# array literal such as ``{Jazz,"Hip-Hop"}`` or a bare name, with enum names
+# and values mixed. The Genre links are kept in step with it on every write and
+# are what genre browsing queries.
+
+GENRE_LINKS = {"Venue": venue_genres, "Artist": artist_genres}
+
+_GENRE_NAMES = {
+    key.lower(): genre.value for genre in Genres for key in (genre.name, genre.value)
+}
+
+
+def genre_name(value):
+    """Return the Genre name for an enum name or value, or ``None``."""
+    return _GENRE_NAMES.get(value.strip().strip('"').lower())
+
+
+def genre_names(genres):
+    """Return the Genre names in a ``genres`` column value, in order."""
+    if isinstance(genres, str):
+        genres = genres.strip("{}").split(",")
+    names = [genre_name(genre) for genre in genres or ()]
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def link_genres(connection, model, genres, batch_size=10000):
+    """Replace the Genre links of ``model`` rows, ``genres`` maps id to names."""
+    table = GENRE_LINKS[model.__name__]
+    owner = table.c[f"{model.__tablename__.lower()}_id"]
+    if not genres:
+        return
+    ids = dict(connection.execute(select([Genre.name, Genre.id])).fetchall())
+    genres = list(genres.items())
+    for offset in range(0, len(genres), batch_size):
+        batch = genres[offset : offset + batch_size]
+        connection.execute(table.delete().where(owner.in_([id for id, _ in batch])))
+        rows = [
+            {owner.name: id, "genre_id": ids[name]}
+            for id, names in batch
+            for name in genre_names(names)
+            if name in ids
+        ]
+        if rows:
+            connection.execute(table.insert(), rows)
+
+
+def with_genre(query, model, genre):
+    """Filter ``query`` over ``model`` to the rows linked to ``genre``."""
+    table = GENRE_LINKS[model.__name__]
+    owner = table.c[f"{model.__tablename__.lower()}_id"]
+    return (
+        query.join(table, owner == model.id)
+        .join(Genre, Genre.id == table.c.genre_id)
+        .filter(Genre.name == (genre_name(genre) or genre))
+    )
+
+
+@event.listens_for(Venue, "before_insert")
+@event.listens_for(Venue, "before_update")
+@event.listens_for(Artist, "before_insert")
+@event.listens_for(Artist, "before_update")
+def store_genres(mapper, connection, target):
+    # the forms hand over a list, store it the way Postgres casts one to text
+    if isinstance(target.genres, (list, tuple)):
+        target.genres = "{" + ",".join(genre_names(target.genres)) + "}"
+
+
+@event.listens_for(Venue, "after_insert")
+@event.listens_for(Venue, "after_update")
+@event.listens_for(Artist, "after_insert")
+@event.listens_for(Artist, "after_update")
+def update_genre_links(mapper, connection, target):
+    if inspect(target).attrs.genres.history.has_changes():
+        link_genres(connection, type(target), {target.id: target.genres})
+
+
+@event.listens_for(Genre.__table__, "after_create")
+def seed_genres(target, connection, **kw):
+    connection.execute(target.insert(), [{"name": genre.value} for genre in Genres])
+
+
+# *----------------------------------------------------------------------------#
+# * Search index
+# *----------------------------------------------------------------------------#
+
+
+@event.listens_for(Venue, "before_insert")
+@event.listens_for(Venue, "before_update")
+@event.listens_for(Artist, "before_insert")
+@event.listens_for(Artist, "before_update")
+def update_search_text(mapper, connection, target):
+    # keep the denormalized search document in step with the searchable fields
+    target.search_text = " ".join(
+        tokenize(target.name, target.city, target.state, target.genres)
+    )
+
+
+for model in (Venue, Artist):
+    # trigram GIN index serving ILIKE '%term%' lookups, see migration a832904c02ff
+    event.listen(
+        model.__table__,
+        "after_create",
+        DDL(
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm;"
+            f"CREATE INDEX ix_{model.__tablename__.lower()}_search_text_trgm "
+            "ON %(fullname)s USING gin (search_text gin_trgm_ops)"
+        ).execute_if(dialect="postgresql"),
+    )
@@ -1,160 +1,131 @@
 import datetime
+import hmac
 import sys
 
 from flask import (
     Blueprint,
     Flask,
     abort,
+    current_app,
     flash,
+    jsonify,
     redirect,
     render_template,
     request,
+    stream_template,
+    stream_with_context,
     url_for,
 )
 
-from database import db
+from database import db, pinned_to_primary, read_replica
 from forms import ArtistForm, ShowForm, VenueForm
 from models.models import Artist, Show, Venue
-from utils.caching import cache
+from services import export, search
+from services.calendar import calendar_filters, ical
+from services.directory import iter_venue_directory, venue_directory
+from services.listings import artist_listing, iter_artists, iter_shows, show_listing
+from services.loaders import load_artist, load_venue
+from utils.caching import cache, coalesced, expire_at, listing_key, path_key
 
 route_blueprint = Blueprint("routes", __name__)
 
 
+def _streamed():
+    # ?stream=1 renders the whole listing as it is read, bypassing the cache
+    return request.args.get("stream", type=int) == 1
+
+
+def _uncached_listing():
+    # a client pinned to the primary must not get a page built from the replica
+    return _streamed() or pinned_to_primary()
+
+
+def _expire_at_next_show(data):
+    # the cached detail page is stale once its next show has started
+    if data["upcoming_shows"]:
+        start_time = data["upcoming_shows"][0]["start_time"]
+        expire_at(datetime.datetime.fromisoformat(start_time))
+
+
+def _listing(loader, template, name, streamer, template_context=None, **filters):
+    # render one keyset page of a listing, as JSON with ?format=json, or
+    # stream every row of it with ?stream=1
+    context = template_context or {}
+    if _streamed():
+        rows = streamer(batch_size=current_app.config["STREAM_BATCH_SIZE"], **filters)
+        return current_app.response_class(
+            stream_template(template, page=None, **{name: rows}, **context),
+            mimetype="text/html",
+        )
+
+    try:
+        page = loader(
+            after=request.args.get("after"),
+            before=request.args.get("before"),
+            limit=request.args.get("limit", type=int),
+            **filters,
+        )
+    except ValueError:
+        abort(400)
+
+    if request.args.get("format") == "json":
+        return jsonify(
+            {name: page.items, "next": page.next_cursor, "prev": page.prev_cursor}
+        )
+    return render_template(template, page=page, **{name: page.items}, **context)
+
+
 @route_blueprint.route("/")
-@cache.cached(timeout=50)
+@cache.cached()
 def index():
     return render_template("pages/home.html")
 
 
 @route_blueprint.route("/venues")
-@cache.cached(timeout=50)
+@coalesced(listing_key("venues"), unless=_uncached_listing)
+@read_replica
 def venues():
-    venues_list = Venue.query.distinct(Venue.city, Venue.state).all()
-    data = [
-        {
-            "city": venue.city,
-            "state": venue.state,
-            "venues": [
-                {
-                    "id": venue.id,
-                    "name": venue.name,
-                    "num_upcoming_shows": len(
-                        [
-                            show
-                            for show in venue.shows
-                            if show.start_time > datetime.datetime.now()
-                        ]
-                    ),
-                }
-                for venue in Venue.query.filter_by(city=venue.city).all()
-            ],
-        }
-        for venue in venues_list
-    ]
-
-    return render_template("pages/venues.html", areas=data)
-
-
-@route_blueprint.route("/venues/search", methods=["POST"])
-@cache.cached(timeout=50)
+    # a page of venues grouped by city and state with their upcoming show
+    # counts, built from a single aggregate query; ?genre=Jazz for one genre
+    return _listing(
+        venue_directory,
+        "pages/venues.html",
+        "areas",
+        iter_venue_directory,
+        genre=request.args.get("genre"),
+    )
+
+
+@route_blueprint.route("/venues/search", methods=["GET", "POST"])
+@read_replica
 def search_venues():
-    # Implement search on artists with partial string search
-    search_term = request.form.get("search_term", "")
-    venues = Venue.query.filter(Venue.name.ilike(f"%{search_term}%")).all()
-    data = [
-        {
-            "id": venue.id,
-            "name": venue.name,
-            "num_upcoming_shows": len(
-                Show.query.filter(Show.venue_id == venue.id)
-                .filter(Show.start_time > datetime.now())
-                .all()
-            ),
-        }
-        for venue in venues
-    ]
-    response = {"count": len(venues), "data": data}
+    # ranked search over name, city, state and genres, cached per term
+    search_term = request.values.get("search_term", "")
+    response = search.search_venues(search_term)
 
     return render_template(
         "pages/search_venues.html",
         results=response,
-        search_term=request.form.get("search_term", ""),
+        search_term=search_term,
     )
 
 
 @route_blueprint.route("/venues/<int:venue_id>")
-@cache.cached(timeout=50)
+@coalesced(path_key, unless=pinned_to_primary)
+@read_replica
 def show_venue(venue_id):
-    # shows the venue page with the given venue_id
-    # replace with real venue data from the venues table, using venue_id
-
-    venues = Venue.query.filter(Venue.id == venue_id).first()
+    # shows the venue page with the given venue_id, past and upcoming shows
+    # are loaded together with their artists in a single query
+    venue = load_venue(venue_id)
+    if venue is None:
+        abort(404)
 
-    # query for past shows and upcoming shows
-    past_shows = (
-        Show.query.filter(Show.venue_id == venue_id)
-        .filter(Show.start_time < datetime.now())
-        .all()
-    )
-    upcoming_shows = (
-        Show.query.filter(Show.venue_id == venue_id)
-        .filter(Show.start_time > datetime.now())
-        .all()
-    )
-
-    # create past shows and upcoming shows list
-    past_shows_list = [
-        {
-            "artist_id": show.artist_id,
-            "artist_name": Artist.query.filter(Artist.id == show.artist_id)
-            .first()
-            .name,
-            "artist_image_link": Artist.query.filter(Artist.id == show.artist_id)
-            .first()
-            .image_link,
-            "start_time": str(show.start_time),
-        }
-        for show in past_shows
-    ]
-
-    upcoming_shows_list = [
-        {
-            "artist_id": show.artist_id,
-            "artist_name": Artist.query.filter(Artist.id == show.artist_id)
-            .first()
-            .name,
-            "artist_image_link": Artist.query.filter(Artist.id == show.artist_id)
-            .first()
-            .image_link,
-            "start_time": str(show.start_time),
-        }
-        for show in upcoming_shows
-    ]
-
-    data = {
-        "id": venues.id,
-        "name": venues.name,
-        "genres": venues.genres,
-        "address": venues.address,
-        "city": venues.city,
-        "state": venues.state,
-        "phone": venues.phone,
-        "website_link": venues.website_link,
-        "facebook_link": venues.facebook_link,
-        "seeking_talent": venues.seeking_talent,
-        "seeking_description": venues.seeking_description,
-        "image_link": venues.image_link,
-        "past_shows": past_shows_list,
-        "upcoming_shows": upcoming_shows_list,
-        "past_shows_count": len(past_shows_list),
-        "upcoming_shows_count": len(upcoming_shows_list),
-    }
-
-    return render_template("pages/show_venue.html", venue=data)
+    _expire_at_next_show(venue)
+    return render_template("pages/show_venue.html", venue=venue)
 
 
 @route_blueprint.route("/venues/create", methods=["GET"])
-@cache.cached(timeout=50)
+@cache.cached()
 def create_venue_form():
     # Renders the form to create a new venue
     form = VenueForm()
@@ -163,7 +134,6 @@ def create_venue_form():
 
 
 @route_blueprint.route("/venues/create", methods=["POST"])
-@cache.cached(timeout=50)
 def create_venue_submission():
     # Insert form data as a new Venue record in the db, instead
     # Modify data to be the data object returned from db insertion
@@ -235,105 +205,49 @@ def delete_venue(venue_id):
 
 
 @route_blueprint.route("/artists")
-@cache.cached(timeout=50)
+@coalesced(listing_key("artists"), unless=_uncached_listing)
+@read_replica
 def artists():
-    # Get the artists from the database
-    artists = Artist.query.all()
-    data = [{"id": artist.id, "name": artist.name} for artist in artists]
-    return render_template("pages/artists.html", artists=data)
+    # a page of artists ordered by name; ?genre=Jazz for one genre
+    return _listing(
+        artist_listing,
+        "pages/artists.html",
+        "artists",
+        iter_artists,
+        genre=request.args.get("genre"),
+    )
 
 
-@route_blueprint.route("/artists/search", methods=["POST"])
-@cache.cached(timeout=50)
+@route_blueprint.route("/artists/search", methods=["GET", "POST"])
+@read_replica
 def search_artists():
-    # Search on artist records with partial string search.
-    search_term = request.form.get("search_term", "")
-    artists = Artist.query.filter(Artist.name.ilike(f"%{search_term}%")).all()
-    data = [
-        {
-            "id": artist.id,
-            "name": artist.name,
-            "num_upcoming_shows": len(
-                Show.query.filter(Show.artist_id == artist.id)
-                .filter(Show.start_time > datetime.now())
-                .all()
-            ),
-        }
-        for artist in artists
-    ]
-    response = {"count": len(artists), "data": data}
+    # ranked search over name, city, state and genres, cached per term
+    search_term = request.values.get("search_term", "")
+    response = search.search_artists(search_term)
 
     return render_template(
         "pages/search_artists.html",
         results=response,
-        search_term=request.form.get("search_term", ""),
+        search_term=search_term,
     )
 
 
 @route_blueprint.route("/artists/<int:artist_id>")
-@cache.cached(timeout=50)
+@coalesced(path_key, unless=pinned_to_primary)
+@read_replica
 def show_artist(artist_id):
-    # shows the artist page with the given artist_id
-    artist = Artist.query.get(artist_id)
-    past_shows = (
-        Show.query.filter(Show.artist_id == artist_id)
-        .filter(Show.start_time < datetime.now())
-        .all()
-    )
-    upcoming_shows = (
-        Show.query.filter(Show.artist_id == artist_id)
-        .filter(Show.start_time > datetime.now())
-        .all()
-    )
+    # shows the artist page with the given artist_id, past and upcoming shows
+    # are loaded together with their venues in a single query
+    artist = load_artist(artist_id)
+    if artist is None:
+        abort(404)
 
-    # filter venues by past shows
-    past_shows_list = [
-        {
-            "venue_id": show.venue_id,
-            "venue_name": Venue.query.filter(Venue.id == show.venue_id).first().name,
-            "venue_image_link": Venue.query.filter(Venue.id == show.venue_id)
-            .first()
-            .image_link,
-            "start_time": str(show.start_time),
-        }
-        for show in past_shows
-    ]
-
-    # filter venues by upcoming shows
-    upcoming_shows_list = [
-        {
-            "venue_id": show.venue_id,
-            "venue_name": Venue.query.filter(Venue.id == show.venue_id).first().name,
-            "venue_image_link": Venue.query.filter(Venue.id == show.venue_id)
-            .first()
-            .image_link,
-            "start_time": str(show.start_time),
-        }
-        for show in upcoming_shows
-    ]
-
-    data = {
-        "id": artist.id,
-        "name": artist.name,
-        "genres": artist.genres,
-        "city": artist.city,
-        "state": artist.state,
-        "phone": artist.phone,
-        "website_link": artist.website_link,
-        "facebook_link": artist.facebook_link,
-        "seeking_venue": artist.seeking_venue,
-        "seeking_description": artist.seeking_description,
-        "image_link": artist.image_link,
-        "past_shows": past_shows_list,
-        "upcoming_shows": upcoming_shows_list,
-        "past_shows_count": len(past_shows_list),
-        "upcoming_shows_count": len(upcoming_shows_list),
-    }
-
-    return render_template("pages/show_artist.html", artist=data)
+    _expire_at_next_show(artist)
+    return render_template("pages/show_artist.html", artist=artist)
 
 
 @route_blueprint.route("/artists/<int:artist_id>/edit", methods=["GET"])
+@read_replica
 def edit_artist(artist_id):
     # Render the form to edit an artist object
     form = ArtistForm()
@@ -389,6 +303,7 @@ def edit_artist_submission(artist_id):
 
 
 @route_blueprint.route("/venues/<int:venue_id>/edit", methods=["GET"])
+@read_replica
 def edit_venue(venue_id):
     # Render the form to edit a venue with the given venue_id
     form = VenueForm()
@@ -444,7 +359,7 @@ def edit_venue_submission(venue_id):
 
 
 @route_blueprint.route("/artists/create", methods=["GET"])
-@cache.cached(timeout=50)
+@cache.cached()
 def create_artist_form():
     # Render the form to create a new artist
     form = ArtistForm()
@@ -452,7 +367,6 @@ def create_artist_form():
 
 
 @route_blueprint.route("/artists/create", methods=["POST"])
-@cache.cached(timeout=50)
 def create_artist_submission():
     # Create a new artist object and add it to the database
     error = False
@@ -492,30 +406,47 @@ def create_artist_submission():
     return render_template("pages/home.html")
 
 
+def _streamed_shows():
+    return _uncached_listing() or request.args.get("format") == "ics"
+
+
+def _ical_url():
+    # the iCalendar feed of the window shown, without the paging arguments
+    args = request.args.to_dict()
+    for name in ("format", "after", "before", "limit", "stream"):
+        args.pop(name, None)
+    return url_for(request.endpoint, format="ics", **args)
+
+
 @route_blueprint.route("/shows")
-@cache.cached(timeout=50)
+@coalesced(listing_key("shows"), unless=_streamed_shows)
+@read_replica
 def shows():
-    # displays list of shows at /shows using Join to get venue and artist info
-    shows = Show.query.join(Venue, Show.venue_id == Venue.id).join(
-        Artist, Show.artist_id == Artist.id
+    # displays a page of shows at /shows using Join to get venue and artist
+    # info; ?from=&to=&city=&state=&genre= narrow it to a calendar window and
+    # ?format=ics streams that window as an iCalendar feed
+    try:
+        filters = calendar_filters(request.args)
+    except ValueError:
+        abort(400)
+
+    if request.args.get("format") == "ics":
+        chunks = ical(current_app.config["STREAM_BATCH_SIZE"], **filters)
+        return current_app.response_class(
+            stream_with_context(chunks), mimetype="text/calendar"
+        )
+    return _listing(
+        show_listing,
+        "pages/shows.html",
+        "shows",
+        iter_shows,
+        template_context={"ical_url": _ical_url()},
+        **filters,
     )
-    data = [
-        {
-            "venue_id": show.venue_id,
-            "venue_name": show.venue.name,
-            "artist_id": show.artist_id,
-            "artist_name": show.artist.name,
-            "artist_image_link": show.artist.image_link,
-            "start_time": str(show.start_time),
-        }
-        for show in shows
-    ]
-
-    return render_template("pages/shows.html", shows=data)
 
 
 @route_blueprint.route("/shows/create")
-@cache.cached(timeout=50)
+@cache.cached()
 def create_shows():
     # renders form
     form = ShowForm()
@@ -523,7 +454,6 @@ def create_shows():
 
 
 @route_blueprint.route("/shows/create", methods=["POST"])
-@cache.cached(timeout=50)
 def create_show_submission():
     error = False
     try:
@@ -548,6 +478,44 @@ def create_show_submission():
     return render_template("pages/home.html")
 
 
+def _export_token_valid(tokens):
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    return any(hmac.compare_digest(token, valid) for valid in tokens)
+
+
+@route_blueprint.route("/export/<entity>")
+@read_replica
+def export_entity(entity):
+    # streams the public columns of every venue, artist or show as NDJSON or
+    # CSV to partners with an export token, gzipped when the client accepts it
+    tokens = current_app.config["EXPORT_TOKENS"]
+    format = request.args.get("format", "ndjson")
+    if not tokens or entity not in export.MODELS or format not in export.FORMATS:
+        abort(404)
+    if not _export_token_valid(tokens):
+        response = jsonify({"error": "An export token is required."})
+        response.headers["WWW-Authenticate"] = 'Bearer realm="export"'
+        return response, 401
+    compress = "gzip" in request.accept_encodings
+    chunks = export.export(
+        entity,
+        format,
+        current_app.config["STREAM_BATCH_SIZE"],
+        compress=compress,
+        public=True,
+    )
+    response = current_app.response_class(
+        stream_with_context(chunks), mimetype=export.FORMATS[format]
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename={entity}.{format}"
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
 @route_blueprint.errorhandler(404)
 def not_found_error(error):
     return render_template("errors/404.html"), 404
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+from models.models import Show
+from services.listings import show_listing_query
+
+# *----------------------------------------------------------------------------#
+# * Calendar
+# *----------------------------------------------------------------------------#
+# ``/shows?from=&to=&city=&state=&genre=`` is the show calendar: the same
+# keyset-paged listing limited to a time window, rendered as HTML or JSON, or
+# streamed whole as an iCalendar feed with ``?format=ics``.
+
+EVENT_LENGTH = timedelta(hours=2)
+# longest iCalendar content line, longer ones are folded
+LINE_OCTETS = 75
+
+
+def _bound(value, end=False):
+    if not value:
+        return None
+    bound = datetime.fromisoformat(value)
+    if bound.tzinfo is not None:
+        # shows are stored in naive local time
+        bound = bound.astimezone().replace(tzinfo=None)
+    if end and len(value) == 10:
+        # a bare date ends the window at the end of that day
+        bound += timedelta(days=1)
+    return bound
+
+
+def calendar_filters(args):
+    """Return the ``show_listing_query`` filters in request ``args``.
+
+    ``from`` and ``to`` are ISO dates or datetimes, ``to`` is exclusive unless
+    it is a bare date. Datetimes with an offset are converted to local time.
+    Raise ValueError on a malformed or inverted window.
+    """
+    start, end = _bound(args.get("from")), _bound(args.get("to"), end=True)
+    if start is not None and end is not None and end <= start:
+        raise ValueError("to must be after from")
+    return {
+        "start": start,
+        "end": end,
+        "city": args.get("city"),
+        "state": (args.get("state") or "").upper() or None,
+        "genre": args.get("genre"),
+    }
+
+
+def _escape(text):
+    text = (text or "").replace("\r\n", "\n").replace("\r", "\n")
+    text = text.replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace(",", "\\,").replace(";", "\\;")
+
+
+def _fold(line):
+    # content lines are at most 75 octets, continued after CRLF and a space,
+    # RFC 5545 3.1, without splitting a UTF-8 character
+    if len(line.encode()) <= LINE_OCTETS:
+        return line
+    parts, part, size = [], "", 0
+    for char in line:
+        octets = len(char.encode())
+        if size + octets > LINE_OCTETS:
+            parts.append(part)
+            part, size = " ", 1
+        part += char
+        size += octets
+    parts.append(part)
+    return "\r\n".join(parts)
+
+
+def _timestamp(value):
+    # shows are stored in local time, so these are floating times
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def ical(batch_size=1000, **filters):
+    """Yield the shows matching ``filters`` as iCalendar text, in chunks."""
+    rows = (
+        show_listing_query(**filters)
+        .order_by(Show.start_time, Show.id)
+        .yield_per(batch_size)
+    )
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Fyyur//Shows//EN\r\n"
+    lines = []
+    for row in rows:
+        place = filter(None, (row.venue_name, row.venue_city, row.venue_state))
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:show-{row.id}@fyyur",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_timestamp(row.start_time)}",
+            f"DTEND:{_timestamp(row.start_time + EVENT_LENGTH)}",
+            _fold(f"SUMMARY:{_escape(f'{row.artist_name} at {row.venue_name}')}"),
+            _fold(f"LOCATION:{_escape(', '.join(place))}"),
+            "END:VEVENT",
+        ]
+        if len(lines) >= 8 * batch_size:
+            yield "\r\n".join(lines) + "\r\n"
+            lines = []
+    if lines:
+        yield "\r\n".join(lines) + "\r\n"
+    yield "END:VCALENDAR\r\n"
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import click
+from sqlalchemy import and_, func, select
+
+from database import db
+from models.models import OWNERS, Artist, Show, Venue
+from utils.caching import bump_generation, cache, purge_pages
+from utils.invalidation import ARTIST_PAGE, VENUE_PAGE
+
+# *----------------------------------------------------------------------------#
+# * Show counter reconciliation
+# *----------------------------------------------------------------------------#
+# The Show events in models.models keep the counters exact as of the last
+# reconciliation. Shows that start afterwards stay counted as upcoming until
+# ``flask reconcile-show-counts`` recounts the venues and artists whose
+# ``next_show_at`` has passed, an index lookup on that column. Run it every
+# few minutes from cron; --all recounts every row, e.g. after a bulk load.
+
+PAGES = {Venue: VENUE_PAGE, Artist: ARTIST_PAGE}
+
+
+def recount(connection, model, owner, where=None, now=None):
+    """Recount the shows of the ``model`` rows matching ``where``, or of
+    those whose next show has started. Return the number of rows updated."""
+    now = now or datetime.now()
+    table = model.__table__
+
+    def shows(column, condition):
+        return select([column]).where(and_(owner == table.c.id, condition)).as_scalar()
+
+    if where is None:
+        where = table.c.next_show_at <= now
+    return connection.execute(
+        table.update()
+        .where(where)
+        .values(
+            upcoming_shows_count=shows(func.count(Show.id), Show.start_time > now),
+            past_shows_count=shows(func.count(Show.id), Show.start_time <= now),
+            next_show_at=shows(func.min(Show.start_time), Show.start_time > now),
+        )
+    ).rowcount
+
+
+def recount_ids(connection, venue_ids=(), artist_ids=(), now=None):
+    """Recount the shows of the given venues and artists."""
+    for (model, _, owner), ids in zip(OWNERS, (venue_ids, artist_ids)):
+        ids = list(ids)
+        if ids:
+            recount(connection, model, owner, model.__table__.c.id.in_(ids), now)
+
+
+@click.command("reconcile-show-counts")
+@click.option("--all", "everything", is_flag=True, help="Recount every row.")
+def reconcile_command(everything):
+    """Move started shows from the upcoming to the past show counts."""
+    connection = db.session.connection()
+    now = datetime.now()
+    updated, pages = 0, []
+    for model, _, owner in OWNERS:
+        table = model.__table__
+        where = table.c.id.isnot(None) if everything else table.c.next_show_at <= now
+        if not everything:
+            ids = connection.execute(select([table.c.id]).where(where))
+            pages += [PAGES[model].format(id) for id, in ids]
+        count = recount(connection, model, owner, where, now)
+        click.echo(f"{count} {model.__tablename__} rows recounted.")
+        updated += count
+    db.session.commit()
+    if not updated:
+        return
+    # bypassed the ORM and so utils.invalidation, the caches are purged here
+    if everything:
+        cache.clear()
+    else:
+        purge_pages(*pages)
+        bump_generation("venues", "artists", "search")
+
+
+def init_app(app):
+    app.cli.add_command(reconcile_command)
@@ -0,0 +1,99 @@
+from itertools import groupby
+
+from sqlalchemy import and_, func
+
+from database import db
+from models.models import Show, Venue, with_genre
+from services.pagination import keyset_page
+
+# *----------------------------------------------------------------------------#
+# * Directory
+# *----------------------------------------------------------------------------#
+# Builds the city/state -> venues -> upcoming show count tree for /venues from
+# one query instead of a query per area and a lazy load per venue. The counts
+# are the venues' stored counters, see services.counters.
+
+
+def _area_key(row):
+    return row.city, row.state
+
+
+def _venue_to_dict(row):
+    return {
+        "id": row.id,
+        "name": row.name,
+        "num_upcoming_shows": row.num_upcoming_shows,
+    }
+
+
+def group_areas(rows):
+    """Group venue rows into areas keyed on ``(city, state)``."""
+    rows = sorted(rows, key=lambda row: (row.state or "", row.city or ""))
+    return [
+        {
+            "city": city,
+            "state": state,
+            "venues": [_venue_to_dict(row) for row in venues],
+        }
+        for (city, state), venues in groupby(rows, key=_area_key)
+    ]
+
+
+def directory_query(now=None, genre=None):
+    # the stored counters, or the shows after ``now`` counted when given one
+    if now is None:
+        query = db.session.query(
+            Venue.id,
+            Venue.name,
+            Venue.city,
+            Venue.state,
+            Venue.upcoming_shows_count.label("num_upcoming_shows"),
+        )
+    else:
+        query = (
+            db.session.query(
+                Venue.id,
+                Venue.name,
+                Venue.city,
+                Venue.state,
+                func.count(Show.id).label("num_upcoming_shows"),
+            )
+            .outerjoin(Show, and_(Show.venue_id == Venue.id, Show.start_time > now))
+            .group_by(Venue.id, Venue.name, Venue.city, Venue.state)
+        )
+    return with_genre(query, Venue, genre) if genre else query
+
+
+def venue_directory(now=None, after=None, before=None, limit=None, genre=None):
+    """Return a :class:`~services.pagination.Page` of areas.
+
+    Venues are paged on ``name, id`` and the venues of each page are grouped
+    into their areas. ``genre`` limits them to the venues of that genre.
+    """
+    page = keyset_page(
+        directory_query(now, genre),
+        [Venue.name, Venue.id],
+        key=lambda row: (row.name, row.id),
+        after=after,
+        before=before,
+        limit=limit,
+    )
+    return page._replace(items=group_areas(page.items))
+
+
+def iter_venue_directory(now=None, batch_size=1000, genre=None):
+    """Yield every area in turn, reading venues with a server-side cursor.
+
+    Each area's ``venues`` is a generator and must be consumed in order.
+    """
+    rows = (
+        directory_query(now, genre)
+        .order_by(Venue.state, Venue.city, Venue.name, Venue.id)
+        .yield_per(batch_size)
+    )
+    for (city, state), venues in groupby(rows, key=_area_key):
+        yield {
+            "city": city,
+            "state": state,
+            "venues": (_venue_to_dict(row) for row in venues),
+        }
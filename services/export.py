@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+import sys
+import zlib
+from contextlib import nullcontext
+from itertools import islice
+
+import click
+from flask import current_app
+
+from database import db
+from models.models import Artist, Show, Venue
+
+# *----------------------------------------------------------------------------#
+# * Export
+# *----------------------------------------------------------------------------#
+# Venues, artists and shows are dumped as NDJSON or CSV by ``flask export`` and
+# /export/<entity>. Rows are read through a server-side cursor (yield_per) and
+# serialized one batch at a time, so memory stays flat however large the table.
+# Genres come out as a list, or joined with "," in CSV, which ``flask import``
+# reads back. The endpoint is for partners holding one of EXPORT_TOKENS and
+# only serves the PUBLIC_COLUMNS.
+
+MODELS = {"venues": Venue, "artists": Artist, "shows": Show}
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+PUBLIC_COLUMNS = {
+    "venues": (
+        "id",
+        "name",
+        "genres",
+        "address",
+        "city",
+        "state",
+        "website_link",
+        "facebook_link",
+        "image_link",
+        "seeking_talent",
+        "seeking_description",
+    ),
+    "artists": (
+        "id",
+        "name",
+        "genres",
+        "city",
+        "state",
+        "website_link",
+        "facebook_link",
+        "image_link",
+        "seeking_venue",
+        "seeking_description",
+    ),
+    "shows": ("id", "venue_id", "artist_id", "start_time"),
+}
+
+
+def columns(entity, public=False):
+    if public:
+        table = MODELS[entity].__table__
+        return [table.c[name] for name in PUBLIC_COLUMNS[entity]]
+    return [
+        column
+        for column in MODELS[entity].__table__.columns
+        if column.name != "search_text"
+    ]
+
+
+def _genres(value):
+    return [genre for genre in (value or "").strip("{}").split(",") if genre]
+
+
+def iter_rows(entity, batch_size=1000, public=False):
+    """Yield every row of ``entity`` as a dict in id order, via a cursor."""
+    names = [column.name for column in columns(entity, public)]
+    query = db.session.query(*columns(entity, public)).order_by(MODELS[entity].id)
+    for row in query.yield_per(batch_size):
+        row = dict(zip(names, row))
+        if "genres" in row:
+            row["genres"] = _genres(row["genres"])
+        yield row
+
+
+def _ndjson(batch, names):
+    return "".join(json.dumps(row, default=str) + "\n" for row in batch)
+
+
+def _csv(batch, names):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, names)
+    for row in batch:
+        if "genres" in row:
+            row["genres"] = ",".join(row["genres"])
+        writer.writerow(row)
+    return buffer.getvalue()
+
+
+def export(entity, format="ndjson", batch_size=1000, compress=False, public=False):
+    """Yield ``entity`` serialized as ``format``, a bytes chunk per batch.
+
+    ``public`` limits the columns to ``PUBLIC_COLUMNS``.
+    """
+    names = [column.name for column in columns(entity, public)]
+    serialize = _ndjson if format == "ndjson" else _csv
+    gzip = zlib.compressobj(wbits=31) if compress else None
+
+    def encode(text):
+        data = text.encode("utf-8")
+        return gzip.compress(data) if gzip else data
+
+    if format == "csv":
+        yield encode(",".join(names) + "\r\n")
+    rows = iter_rows(entity, batch_size, public)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        chunk = encode(serialize(batch, names))
+        if chunk:
+            yield chunk
+    if gzip:
+        yield gzip.flush()
+
+
+@click.command("export")
+@click.argument("entity", type=click.Choice(sorted(MODELS)))
+@click.option("--format", type=click.Choice(sorted(FORMATS)), default="ndjson")
+@click.option("--output", type=click.Path(dir_okay=False), help="Default stdout.")
+@click.option("--gzip", "compress", is_flag=True, help="Implied by a .gz output.")
+def export_command(entity, format, output, compress):
+    """Dump every venue, artist or show as NDJSON or CSV."""
+    compress = compress or (output or "").endswith(".gz")
+    chunks = export(
+        entity, format, current_app.config["STREAM_BATCH_SIZE"], compress=compress
+    )
+    with open(output, "wb") if output else nullcontext(sys.stdout.buffer) as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def init_app(app):
+    app.cli.add_command(export_command)
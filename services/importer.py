@@ -0,0 +1,354 @@
+import csv
+import io
+import json
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+
+import click
+from flask_wtf import Form
+from sqlalchemy import func, select, tuple_
+from werkzeug.datastructures import MultiDict
+
+from database import db
+from forms import ArtistForm, VenueForm, validate_phone
+from models.models import Artist, Show, Venue, genre_names, link_genres, touch
+from services import search
+from services.counters import recount_ids
+from utils.caching import bump_generation, cache
+from utils.text import tokenize
+
+# *----------------------------------------------------------------------------#
+# * Bulk import
+# *----------------------------------------------------------------------------#
+# ``flask import venues|artists|shows FILE`` streams CSV or JSONL rows, checks
+# them with the field rules of VenueForm/ArtistForm and inserts them in
+# batches, one transaction per batch. Shows name their venue and artist by id
+# or by name, resolved with one query per batch, and are loaded with COPY on
+# Postgres. Bulk inserts skip the ORM events, so the import fills in
+# search_text and clears the page cache and search index itself.
+
+FIELDS = {
+    "venues": (
+        "name",
+        "city",
+        "state",
+        "address",
+        "phone",
+        "image_link",
+        "facebook_link",
+        "website_link",
+        "seeking_talent",
+        "seeking_description",
+    ),
+    "artists": (
+        "name",
+        "city",
+        "state",
+        "phone",
+        "image_link",
+        "facebook_link",
+        "website_link",
+        "seeking_venue",
+        "seeking_description",
+    ),
+}
+
+
+FORMS = {"venues": VenueForm, "artists": ArtistForm}
+MODELS = {"venues": Venue, "artists": Artist}
+
+
+class Rejected(ValueError):
+    pass
+
+
+def read_rows(stream, format):
+    """Yield ``(line number, row dict)`` from a CSV or JSONL text stream.
+
+    A JSONL line that is not a JSON object is yielded as a ``Rejected`` in
+    place of its row.
+    """
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except (TypeError, ValueError) as e:
+                yield number, Rejected(f"Invalid JSON: {e}")
+                continue
+            if not isinstance(row, dict):
+                row = Rejected("Not a JSON object")
+            yield number, row
+
+
+def _genres(value):
+    if isinstance(value, str):
+        value = value.replace(";", ",").replace("|", ",").split(",")
+    return [genre.strip() for genre in value or () if genre.strip()]
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
+
+
+def validate(entity, row):
+    """Return the column values of ``row`` checked with the form rules.
+
+    The field validators and the phone, state and genre rules of the forms
+    apply; the duplicate venue check is done per batch by the caller.
+    """
+    formdata = MultiDict(
+        [(k, v) for k, v in row.items() if k != "genres" and v is not None]
+    )
+    for genre in _genres(row.get("genres")):
+        formdata.add("genres", genre)
+    form = FORMS[entity](formdata=formdata, meta={"csrf": False})
+    # the forms' own validate() flashes and queries per row
+    if not Form.validate(form):
+        raise Rejected(json.dumps(form.errors))
+    if not validate_phone(form.phone.data or ""):
+        raise Rejected("Invalid phone number")
+
+    values = {field: form[field].data or None for field in FIELDS[entity]}
+    for field in ("seeking_talent", "seeking_venue"):
+        if field in values:
+            values[field] = _flag(row.get(field))
+    values["genres"] = "{" + ",".join(genre_names(form.genres.data)) + "}"
+    values["search_text"] = " ".join(
+        tokenize(values["name"], values["city"], values["state"], values["genres"])
+    )
+    return values
+
+
+def _existing_venues(rows):
+    keys = {(values["name"], values["address"]) for _, values in rows}
+    return set(
+        db.session.query(Venue.name, Venue.address).filter(
+            tuple_(Venue.name, Venue.address).in_(list(keys))
+        )
+    )
+
+
+def _load_people(entity, batch, rejects):
+    rows = []
+    for number, row in batch:
+        try:
+            rows.append((number, validate(entity, row)))
+        except Rejected as e:
+            rejects.append((number, str(e)))
+
+    if entity == "venues" and rows:
+        existing = _existing_venues(rows)
+        unique = []
+        for number, values in rows:
+            key = (values["name"], values["address"])
+            if key in existing:
+                rejects.append((number, "Venue already exists"))
+                continue
+            existing.add(key)
+            unique.append((number, values))
+        rows = unique
+
+    rows = [values for _, values in rows]
+    if not rows:
+        return 0
+    # the ids are needed for the Genre links, which the mapper events skipped
+    ids = _insert_returning_ids(MODELS[entity], rows)
+    link_genres(
+        db.session.connection(),
+        MODELS[entity],
+        {id: values["genres"] for id, values in zip(ids, rows)},
+    )
+    return len(rows)
+
+
+def _insert_returning_ids(model, rows):
+    """Insert ``rows`` in one statement and return their ids in order.
+
+    ``bulk_insert_mappings(return_defaults=True)`` would insert row by row to
+    read each id back.
+    """
+    table = model.__table__
+    connection = db.session.connection()
+    if connection.dialect.name == "postgresql":
+        inserted = connection.execute(table.insert().values(rows).returning(table.c.id))
+        return [id for id, in inserted]
+    connection.execute(table.insert(), rows)
+    # SQLite: the batch's transaction holds the write lock since its first
+    # row, so its rowids are the last len(rows) ones
+    last = connection.execute(select([func.max(table.c.id)])).scalar()
+    return list(range(last - len(rows) + 1, last + 1))
+
+
+def _resolve(model, references):
+    """Map venue or artist ids and names in ``references`` to ids, one query."""
+    ids = {r for r in references if isinstance(r, int)}
+    names = {r for r in references if isinstance(r, str)}
+    resolved = {}
+    if ids:
+        found = db.session.query(model.id).filter(model.id.in_(ids))
+        resolved.update((id, id) for id, in found)
+    if names:
+        found = db.session.query(model.name, model.id).filter(model.name.in_(names))
+        for name, id in found:
+            # a name shared by several rows cannot be resolved
+            resolved[name] = None if name in resolved else id
+    return resolved
+
+
+def _reference(row, kind):
+    value = row.get(f"{kind}_id")
+    if value not in (None, ""):
+        return int(value)
+    return (row.get(kind) or row.get(f"{kind}_name") or "").strip() or None
+
+
+def _start_time(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        # only for the odd non ISO value, dateutil is slow to import
+        import dateutil.parser
+
+        return dateutil.parser.parse(value)
+
+
+def _copy_shows(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        (row["venue_id"], row["artist_id"], row["start_time"].isoformat())
+        for row in rows
+    )
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(
+        f'COPY "{Show.__tablename__}" (venue_id, artist_id, start_time) '
+        "FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def _load_shows(batch, rejects):
+    parsed = []
+    for number, row in batch:
+        try:
+            parsed.append(
+                (
+                    number,
+                    _reference(row, "venue"),
+                    _reference(row, "artist"),
+                    _start_time(row.get("start_time")),
+                )
+            )
+        except (TypeError, ValueError, OverflowError) as e:
+            rejects.append((number, f"Invalid show: {e}"))
+
+    venues = _resolve(Venue, {venue for _, venue, _, _ in parsed})
+    artists = _resolve(Artist, {artist for _, _, artist, _ in parsed})
+    rows = []
+    for number, venue, artist, start_time in parsed:
+        if venues.get(venue) is None or artists.get(artist) is None:
+            rejects.append((number, f"Unknown venue {venue!r} or artist {artist!r}"))
+            continue
+        rows.append(
+            {
+                "venue_id": venues[venue],
+                "artist_id": artists[artist],
+                "start_time": start_time,
+            }
+        )
+
+    if rows and db.engine.dialect.name == "postgresql":
+        _copy_shows(rows)
+    else:
+        db.session.bulk_insert_mappings(Show, rows)
+    # the Show mapper events that bump and count these are skipped too
+    venue_ids = {row["venue_id"] for row in rows}
+    artist_ids = {row["artist_id"] for row in rows}
+    touch(db.session.connection(), venue_ids, artist_ids)
+    recount_ids(db.session.connection(), venue_ids, artist_ids)
+    return len(rows)
+
+
+def import_rows(entity, rows, batch_size=5000, progress=None):
+    """Import ``(line number, row)`` pairs, return ``(imported, rejects)``."""
+    imported, rejects = 0, []
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        batch = []
+        for number, row in chunk:
+            if isinstance(row, Rejected):
+                rejects.append((number, str(row)))
+            else:
+                batch.append((number, row))
+        if entity == "shows":
+            imported += _load_shows(batch, rejects)
+        else:
+            imported += _load_people(entity, batch, rejects)
+        db.session.commit()
+        if progress is not None:
+            progress(imported, len(rejects))
+
+    # bulk inserts bypass utils.invalidation and the search index listeners;
+    # the generation is shared, so every worker rebuilds its search index
+    cache.clear()
+    bump_generation(search.INDEX_NAMESPACE)
+    return imported, rejects
+
+
+@click.command("import")
+@click.argument("entity", type=click.Choice(["venues", "artists", "shows"]))
+@click.argument("file", type=click.File("r", encoding="utf-8"))
+@click.option("--format", type=click.Choice(["csv", "jsonl"]), default=None)
+@click.option("--batch-size", default=5000, show_default=True)
+@click.option(
+    "--errors",
+    type=click.File("w", encoding="utf-8"),
+    help="Write every rejected line and the reason to this file.",
+)
+def import_command(entity, file, format, batch_size, errors):
+    """Bulk import venues, artists or shows from a CSV or JSONL FILE."""
+    format = format or ("jsonl" if file.name.endswith((".jsonl", ".json")) else "csv")
+    started = time.perf_counter()
+
+    def progress(imported, rejected):
+        elapsed = time.perf_counter() - started
+        click.echo(
+            f"\r{imported} {entity} imported, {rejected} rejected, "
+            f"{imported / elapsed:.0f} rows/s",
+            nl=False,
+            err=True,
+        )
+
+    imported, rejects = import_rows(
+        entity, read_rows(file, format), batch_size, progress
+    )
+    elapsed = time.perf_counter() - started
+    click.echo("", err=True)
+    for number, reason in rejects[:20]:
+        click.echo(f"line {number}: {reason}", err=True)
+    if errors is not None:
+        errors.writelines(f"{number}\t{reason}\n" for number, reason in rejects)
+    click.echo(
+        f"Imported {imported} {entity} in {elapsed:.1f}s "
+        f"({imported / max(elapsed, 1e-9):.0f} rows/s), {len(rejects)} rejected."
+    )
+    if rejects:
+        sys.exit(1)
+
+
+def init_app(app):
+    app.cli.add_command(import_command)
@@ -0,0 +1,110 @@
+from sqlalchemy import func
+
+from database import db
+from models.models import Artist, Show, Venue, with_genre
+from services.pagination import keyset_page
+
+# *----------------------------------------------------------------------------#
+# * Listings
+# *----------------------------------------------------------------------------#
+# Paged and streamed queries behind /shows and /artists, selecting only the
+# columns the listing templates need. /shows doubles as the show calendar,
+# filtered to a time window, place and genre.
+
+
+def show_to_dict(row):
+    return {
+        "venue_id": row.venue_id,
+        "venue_name": row.venue_name,
+        "artist_id": row.artist_id,
+        "artist_name": row.artist_name,
+        "artist_image_link": row.artist_image_link,
+        "start_time": str(row.start_time),
+    }
+
+
+def show_listing_query(start=None, end=None, city=None, state=None, genre=None):
+    """Return the shows query, limited to those starting in ``[start, end)``
+    at venues in ``city`` and ``state`` by artists of ``genre`` if given."""
+    query = (
+        db.session.query(
+            Show.id,
+            Show.start_time,
+            Show.venue_id,
+            Venue.name.label("venue_name"),
+            Venue.city.label("venue_city"),
+            Venue.state.label("venue_state"),
+            Show.artist_id,
+            Artist.name.label("artist_name"),
+            Artist.image_link.label("artist_image_link"),
+        )
+        .join(Venue, Show.venue_id == Venue.id)
+        .join(Artist, Show.artist_id == Artist.id)
+    )
+    # the time window is a range scan on ix_shows_start_time_venue_id
+    if start is not None:
+        query = query.filter(Show.start_time >= start)
+    if end is not None:
+        query = query.filter(Show.start_time < end)
+    if city:
+        query = query.filter(Venue.city == city)
+    if state:
+        query = query.filter(Venue.state == state)
+    return with_genre(query, Artist, genre) if genre else query
+
+
+def show_listing(after=None, before=None, limit=None, **filters):
+    """Return a page of shows ordered by ``start_time, id``, ``filters`` as
+    for ``show_listing_query``."""
+    page = keyset_page(
+        show_listing_query(**filters),
+        [Show.start_time, Show.id],
+        key=lambda row: (row.start_time, row.id),
+        after=after,
+        before=before,
+        limit=limit,
+    )
+    return page._replace(items=[show_to_dict(row) for row in page.items])
+
+
+def show_listing_version():
+    """Return the latest ``updated_at`` of shows, venues and artists."""
+    return db.session.query(
+        *[
+            db.session.query(func.max(model.updated_at)).as_scalar()
+            for model in (Show, Venue, Artist)
+        ]
+    ).one()
+
+
+def artist_query(genre=None):
+    query = db.session.query(Artist.id, Artist.name)
+    return with_genre(query, Artist, genre) if genre else query
+
+
+def artist_listing(after=None, before=None, limit=None, genre=None):
+    """Return a page of artists ordered by ``name, id``, optionally of
+    ``genre`` only."""
+    page = keyset_page(
+        artist_query(genre),
+        [Artist.name, Artist.id],
+        key=lambda row: (row.name, row.id),
+        after=after,
+        before=before,
+        limit=limit,
+    )
+    return page._replace(items=[{"id": row.id, "name": row.name} for row in page.items])
+
+
+def iter_shows(batch_size=1000, **filters):
+    """Yield every show in ``start_time, id`` order via a server-side cursor."""
+    rows = show_listing_query(**filters).order_by(Show.start_time, Show.id)
+    for row in rows.yield_per(batch_size):
+        yield show_to_dict(row)
+
+
+def iter_artists(batch_size=1000, genre=None):
+    """Yield every artist in ``name, id`` order via a server-side cursor."""
+    rows = artist_query(genre).order_by(Artist.name, Artist.id)
+    for row in rows.yield_per(batch_size):
+        yield {"id": row.id, "name": row.name}
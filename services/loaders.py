@@ -0,0 +1,152 @@
+from datetime import datetime
+
+from sqlalchemy import case, func
+
+from database import db
+from models.models import Artist, Show, Venue
+
+# *----------------------------------------------------------------------------#
+# * Loaders
+# *----------------------------------------------------------------------------#
+# Each loader fetches an entity together with all of its shows and the
+# counterpart Artist or Venue in a single query, so the detail pages cost a
+# constant number of round trips no matter how many shows are attached.
+
+
+def split_shows(shows, now=None):
+    """Split ``shows`` into ``(past, upcoming)`` using one shared ``now``."""
+    now = now or datetime.now()
+    past, upcoming = [], []
+    for show in shows:
+        (upcoming if show["start_time"] > now else past).append(show)
+    return past, upcoming
+
+
+def venue_to_dict(venue):
+    return {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": venue.genres,
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "website_link": venue.website_link,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+    }
+
+
+def artist_to_dict(artist):
+    return {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": artist.genres,
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website_link": artist.website_link,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+    }
+
+
+def _with_shows(data, shows, now):
+    past, upcoming = split_shows(shows, now)
+    for show in shows:
+        show["start_time"] = str(show["start_time"])
+    data.update(
+        past_shows=past,
+        upcoming_shows=upcoming,
+        past_shows_count=len(past),
+        upcoming_shows_count=len(upcoming),
+    )
+    return data
+
+
+def load_venue(venue_id, now=None):
+    """Return the venue detail dict for ``venue_id`` or ``None``."""
+    rows = (
+        db.session.query(Venue, Show.start_time, Artist)
+        .outerjoin(Show, Show.venue_id == Venue.id)
+        .outerjoin(Artist, Artist.id == Show.artist_id)
+        .filter(Venue.id == venue_id)
+        .order_by(Show.start_time)
+        .all()
+    )
+    if not rows:
+        return None
+
+    shows = [
+        {
+            "artist_id": artist.id,
+            "artist_name": artist.name,
+            "artist_image_link": artist.image_link,
+            "start_time": start_time,
+        }
+        for _, start_time, artist in rows
+        if start_time is not None
+    ]
+    return _with_shows(venue_to_dict(rows[0][0]), shows, now)
+
+
+def load_artist(artist_id, now=None):
+    """Return the artist detail dict for ``artist_id`` or ``None``."""
+    rows = (
+        db.session.query(Artist, Show.start_time, Venue)
+        .outerjoin(Show, Show.artist_id == Artist.id)
+        .outerjoin(Venue, Venue.id == Show.venue_id)
+        .filter(Artist.id == artist_id)
+        .order_by(Show.start_time)
+        .all()
+    )
+    if not rows:
+        return None
+
+    shows = [
+        {
+            "venue_id": venue.id,
+            "venue_name": venue.name,
+            "venue_image_link": venue.image_link,
+            "start_time": start_time,
+        }
+        for _, start_time, venue in rows
+        if start_time is not None
+    ]
+    return _with_shows(artist_to_dict(rows[0][0]), shows, now)
+
+
+def _version(model, counterpart, show_key, counterpart_key, id, now):
+    now = now or datetime.now()
+    row = (
+        db.session.query(
+            model.updated_at,
+            func.max(counterpart.updated_at),
+            func.max(case([(Show.start_time <= now, Show.start_time)])),
+        )
+        .outerjoin(Show, show_key == model.id)
+        .outerjoin(counterpart, counterpart.id == counterpart_key)
+        .filter(model.id == id)
+        .group_by(model.id, model.updated_at)
+        .first()
+    )
+    return tuple(row) if row else None
+
+
+def venue_version(venue_id, now=None):
+    """Return what ``load_venue`` output depends on, without loading it.
+
+    That is the venue's and its artists' latest ``updated_at`` and the start
+    of its latest show before ``now``, which moves a show from upcoming to
+    past. ``None`` if there is no such venue.
+    """
+    return _version(Venue, Artist, Show.venue_id, Show.artist_id, venue_id, now)
+
+
+def artist_version(artist_id, now=None):
+    """Return what ``load_artist`` output depends on, see ``venue_version``."""
+    return _version(Artist, Venue, Show.artist_id, Show.venue_id, artist_id, now)
@@ -0,0 +1,82 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import literal, tuple_
+
+# *----------------------------------------------------------------------------#
+# * Keyset pagination
+# *----------------------------------------------------------------------------#
+# Listings are paged on a unique, ordered key (e.g. ``start_time, id``) rather
+# than with OFFSET, so every page touches at most ``limit + 1`` rows however
+# deep the user pages. Cursors are the opaque, url-safe encoding of the key of
+# the first or last row of the current page.
+
+Page = namedtuple("Page", ["items", "next_cursor", "prev_cursor"])
+
+
+def encode_cursor(values):
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _coerce(column, value):
+    # a crafted cursor must not reach the database with the wrong types
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if not isinstance(value, python_type) or isinstance(value, bool):
+        raise ValueError(f"{column.key} must be a {python_type.__name__}")
+    return value
+
+
+def decode_cursor(cursor, columns):
+    """Decode ``cursor`` into key values for ``columns``, or raise ValueError."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong number of key values")
+        return [_coerce(column, value) for column, value in zip(columns, values)]
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def page_size(limit=None):
+    """Clamp the requested page size to the configured bounds."""
+    config = current_app.config
+    return max(1, min(limit or config["PAGE_SIZE"], config["MAX_PAGE_SIZE"]))
+
+
+def keyset_page(query, columns, key, after=None, before=None, limit=None):
+    """Return one :class:`Page` of ``query`` ordered by ``columns``.
+
+    ``key`` maps a result row to its values for ``columns``. ``after`` and
+    ``before`` are cursors taken from a previous page; ``before`` wins if both
+    are given.
+    """
+    limit = page_size(limit)
+    backwards = before is not None
+    cursor = before if backwards else after
+
+    if cursor is not None:
+        values = decode_cursor(cursor, columns)
+        bound = tuple_(*[literal(v, type_=c.type) for c, v in zip(columns, values)])
+        keys = tuple_(*columns)
+        query = query.filter(keys < bound if backwards else keys > bound)
+
+    order = [column.desc() for column in columns] if backwards else columns
+    rows = query.order_by(*order).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return Page([], None, None)
+
+    first, last = encode_cursor(key(rows[0])), encode_cursor(key(rows[-1]))
+    if backwards:
+        return Page(rows, last, first if has_more else None)
+    return Page(rows, last if has_more else None, first if cursor else None)
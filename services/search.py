@@ -0,0 +1,194 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import func
+
+from database import db, replica_lagging
+from models.models import Artist, Show, Venue
+from utils.caching import LRUCache, generation
+from utils.text import tokenize
+
+# *----------------------------------------------------------------------------#
+# * Search
+# *----------------------------------------------------------------------------#
+# Venues and artists keep a denormalized ``search_text`` document (name, city,
+# state and genres). On Postgres it is served by a trigram GIN index, anywhere
+# else by an in-process inverted index per worker, rebuilt when the
+# INDEX_NAMESPACE generation shared by all workers is bumped.
+
+
+class InvertedIndex(object):
+    """Substring index mapping every token suffix to the ids containing it."""
+
+    def __init__(self):
+        self._postings = defaultdict(set)
+        self._documents = {}
+        self._keys = []
+        self._dirty = False
+
+    def add(self, id, text):
+        self.remove(id)
+        tokens = set(tokenize(text))
+        self._documents[id] = tokens
+        for token in tokens:
+            for start in range(len(token)):
+                suffix = token[start:]
+                if suffix not in self._postings:
+                    self._dirty = True
+                self._postings[suffix].add(id)
+
+    def remove(self, id):
+        for token in self._documents.pop(id, ()):
+            for start in range(len(token)):
+                self._postings[token[start:]].discard(id)
+
+    def lookup(self, token):
+        """Return the ids with a token containing ``token``."""
+        if self._dirty:
+            self._keys = sorted(self._postings)
+            self._dirty = False
+        ids = set()
+        for position in range(bisect_left(self._keys, token), len(self._keys)):
+            key = self._keys[position]
+            if not key.startswith(token):
+                break
+            ids |= self._postings[key]
+        return ids
+
+    def search(self, tokens):
+        """Return ``(id, score)`` pairs matching every token, best first."""
+        matches = None
+        for token in tokens:
+            ids = self.lookup(token)
+            matches = ids if matches is None else matches & ids
+        if matches is None:
+            matches = self._documents.keys()
+
+        def score(id):
+            words = self._documents[id]
+            return sum(2 if token in words else 1 for token in tokens)
+
+        return sorted(((id, score(id)) for id in matches), key=lambda m: (-m[1], m[0]))
+
+
+_index_lock = threading.Lock()
+
+# bumped by every committed change to a search_text, see utils.invalidation,
+# and by bulk imports, so that every worker rebuilds its index
+INDEX_NAMESPACE = "search_index"
+
+
+def _inverted_index(model):
+    token = generation(INDEX_NAMESPACE)
+    indexes = current_app.extensions.setdefault("search_index", {})
+    built = indexes.get(model.__name__)
+    if built is None or built[0] != token:
+        with _index_lock:
+            built = indexes.get(model.__name__)
+            if built is None or built[0] != token:
+                index = InvertedIndex()
+                for id, text in db.session.query(model.id, model.search_text):
+                    index.add(id, text)
+                built = (token, index)
+                # an index read from a lagging replica would be kept until the
+                # next bump, see database.read_replica
+                if not replica_lagging():
+                    indexes[model.__name__] = built
+    return built[1]
+
+
+def upcoming_show_counts(column, ids, now=None):
+    """Return ``{id: upcoming show count}`` for ``ids`` in a single query."""
+    if not ids:
+        return {}
+    now = now or datetime.now()
+    rows = (
+        db.session.query(column, func.count(Show.id))
+        .filter(column.in_(ids), Show.start_time > now)
+        .group_by(column)
+        .all()
+    )
+    return dict(rows)
+
+
+def _search_postgres(model, tokens, limit):
+    query = db.session.query(model.id, model.name, func.count().over())
+    for token in tokens:
+        query = query.filter(model.search_text.ilike(f"%{token}%"))
+    rows = (
+        query.order_by(
+            func.similarity(model.search_text, " ".join(tokens)).desc(), model.name
+        )
+        .limit(limit)
+        .all()
+    )
+    return (rows[0][2] if rows else 0), [(id, name) for id, name, _ in rows]
+
+
+def _search_inverted_index(model, tokens, limit):
+    matches = _inverted_index(model).search(tokens)
+    ids = [id for id, _ in matches[:limit]]
+    names = dict(db.session.query(model.id, model.name).filter(model.id.in_(ids)))
+    return len(matches), [(id, names[id]) for id in ids if id in names]
+
+
+def _search(model, show_column, tokens, now):
+    limit = current_app.config["SEARCH_RESULTS_LIMIT"]
+    if db.engine.dialect.name == "postgresql":
+        count, hits = _search_postgres(model, tokens, limit)
+    else:
+        count, hits = _search_inverted_index(model, tokens, limit)
+
+    ids = [id for id, _ in hits]
+    if now is None:
+        counts = dict(
+            db.session.query(model.id, model.upcoming_shows_count).filter(
+                model.id.in_(ids)
+            )
+        )
+    else:
+        counts = upcoming_show_counts(show_column, ids, now)
+    data = [
+        {"id": id, "name": name, "num_upcoming_shows": counts.get(id, 0)}
+        for id, name in hits
+    ]
+    return {"count": count, "data": data}
+
+
+def _result_cache():
+    config = current_app.config
+    if "search_results" not in current_app.extensions:
+        current_app.extensions["search_results"] = LRUCache(
+            config["SEARCH_CACHE_SIZE"], config["SEARCH_CACHE_TTL"]
+        )
+    return current_app.extensions["search_results"]
+
+
+def search(model, show_column, term, now=None):
+    """Return ranked ``{"count", "data"}`` search results for ``term``.
+
+    Results are cached per normalized term until the next committed write to
+    venues, artists or shows, or for ``SEARCH_CACHE_TTL`` seconds at most.
+    """
+    tokens = tokenize(term)
+    if now is not None:
+        return _search(model, show_column, tokens, now)
+
+    key = (model.__name__, generation("search"), " ".join(tokens))
+    results = _result_cache().get(key)
+    if results is None:
+        results = _search(model, show_column, tokens, now)
+        if not replica_lagging():
+            _result_cache().set(key, results)
+    return results
+
+
+def search_venues(term, now=None):
+    return search(Venue, Show.venue_id, term, now)
+
+
+def search_artists(term, now=None):
+    return search(Artist, Show.artist_id, term, now)
@@ -0,0 +1,141 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+from app import create_app
+from database import db
+from models.models import Artist, Show, Venue
+from utils.querystats import collect
+
+
+class ApiTestCase(unittest.TestCase):
+    """This test case will test the JSON API and its conditional GETs"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        venue = Venue(name="Boiler Room", city="Chicago", genres="Jazz")
+        artist = Artist(name="Miles", city="Chicago", genres="Jazz")
+        db.session.add_all([venue, artist])
+        db.session.flush()
+        db.session.add(
+            Show(
+                venue_id=venue.id,
+                artist_id=artist.id,
+                start_time=datetime.now() + timedelta(days=1),
+            )
+        )
+        db.session.commit()
+        db.session.remove()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_venue(self):
+        """
+        GIVEN a venue with an upcoming show
+        WHEN it is requested from the API (GET)
+        THEN its detail is returned as JSON with an ETag and Last-Modified
+        """
+        response = self.client.get("/api/v1/venues/1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["name"], "Boiler Room")
+        self.assertEqual(response.json["upcoming_shows"][0]["artist_name"], "Miles")
+        self.assertFalse(response.headers["ETag"].startswith("W/"))
+        self.assertIn("Last-Modified", response.headers)
+
+    def test_genre_list(self):
+        """
+        GIVEN a venue whose genres column holds an array literal
+        WHEN it is requested from the API, in full or trimmed (GET)
+        THEN its genres are returned as a JSON list of names
+        """
+        Venue.query.get(1).genres = '{Jazz,"Rock n Roll"}'
+        db.session.commit()
+        db.session.remove()
+
+        for query in ("", "?fields=genres"):
+            response = self.client.get(f"/api/v1/venues/1{query}")
+            self.assertEqual(response.json["genres"], ["Jazz", "Rock n Roll"], query)
+        response = self.client.get("/api/v1/artists/1")
+        self.assertEqual(response.json["genres"], ["Jazz"])
+
+    def test_not_modified(self):
+        """
+        GIVEN the ETag of an artist
+        WHEN it is revalidated with If-None-Match (GET)
+        THEN a 304 is returned after the version query alone
+        """
+        etag = self.client.get("/api/v1/artists/1").headers["ETag"]
+        with collect() as stats:
+            response = self.client.get(
+                "/api/v1/artists/1", headers={"If-None-Match": etag}
+            )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(stats.count, 1)
+
+    def test_new_show_changes_etag(self):
+        """
+        GIVEN the ETag and Last-Modified of a venue
+        WHEN a show is added to it and it is revalidated (GET)
+        THEN the full venue is returned again
+        """
+        first = self.client.get("/api/v1/venues/1")
+        db.session.add(
+            Show(venue_id=1, artist_id=1, start_time=datetime.now() + timedelta(days=2))
+        )
+        db.session.commit()
+        db.session.remove()
+
+        response = self.client.get(
+            "/api/v1/venues/1", headers={"If-None-Match": first.headers["ETag"]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["upcoming_shows_count"], 2)
+
+        not_modified = self.client.get(
+            "/api/v1/venues/1",
+            headers={"If-Modified-Since": response.headers["Last-Modified"]},
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_last_modified_in_utc(self):
+        """
+        GIVEN a venue written just now by the database clock
+        WHEN it is requested (GET)
+        THEN its updated_at and Last-Modified are the current UTC time
+        """
+        updated_at = db.session.query(Venue.updated_at).scalar()
+        response = self.client.get("/api/v1/venues/1")
+        last_modified = parsedate_to_datetime(response.headers["Last-Modified"])
+
+        self.assertAlmostEqual(
+            updated_at, datetime.utcnow(), delta=timedelta(minutes=1)
+        )
+        self.assertAlmostEqual(
+            last_modified, datetime.now(timezone.utc), delta=timedelta(minutes=1)
+        )
+
+    def test_sparse_fields(self):
+        """
+        GIVEN a fieldset without shows
+        WHEN a venue and the shows are requested with it (GET)
+        THEN only those fields are returned, and unknown fields are a 400
+        """
+        venue = self.client.get("/api/v1/venues/1?fields=name,city")
+        shows = self.client.get("/api/v1/shows?fields=venue_name")
+        unknown = self.client.get("/api/v1/venues/1?fields=password")
+
+        self.assertEqual(
+            venue.json, {"id": 1, "name": "Boiler Room", "city": "Chicago"}
+        )
+        self.assertEqual(shows.json["shows"], [{"venue_name": "Boiler Room"}])
+        self.assertEqual(unknown.status_code, 400)
+        self.assertIn("password", unknown.json["error"])
@@ -0,0 +1,146 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from utils.caching import (
+    LRUCache,
+    bump_generation,
+    cache,
+    coalesced,
+    expire_at,
+    generation,
+    page_key,
+    purge_pages,
+)
+
+
+class CoalescedTestCase(unittest.TestCase):
+    """This test case will test the single-flight view cache"""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.from_object("config.TestingConfig")
+        self.app.config["CACHE_LOCK_TIMEOUT"] = 0.2
+        cache.init_app(self.app)
+        self.calls = 0
+
+        @self.app.route("/page")
+        @coalesced(lambda: "view//page")
+        def page():
+            self.calls += 1
+            return f"build {self.calls}"
+
+        @self.app.route("/show")
+        @coalesced(lambda: page_key("/show"))
+        def show():
+            self.calls += 1
+            expire_at(datetime.now() + timedelta(minutes=1))
+            if self.calls == 1:
+                # a write commits while this page is being built
+                purge_pages("/show")
+            return f"build {self.calls}"
+
+        @self.app.route("/listing")
+        @coalesced(lambda: f"view/shows/{generation('shows')}/listing")
+        def listing():
+            self.calls += 1
+            if self.calls == 1:
+                bump_generation("shows")
+            return f"build {self.calls}"
+
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        self.ctx.pop()
+
+    def _expire(self):
+        fresh_until, rv = cache.get("view//page")
+        cache.set("view//page", (time.time() - 1, rv))
+
+    def test_fresh_page_is_cached(self):
+        """
+        GIVEN a cached page
+        WHEN it is requested again before it expires
+        THEN the view is not called again
+        """
+        self.assertEqual(self.client.get("/page").data, b"build 1")
+        self.assertEqual(self.client.get("/page").data, b"build 1")
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_page_served_while_rebuilding(self):
+        """
+        GIVEN an expired page whose rebuild lock is held by another worker
+        WHEN it is requested
+        THEN the stale page is served without calling the view
+        """
+        self.client.get("/page")
+        self._expire()
+        cache.add("lock/view//page", "other worker")
+
+        self.assertEqual(self.client.get("/page").data, b"build 1")
+        self.assertEqual(self.calls, 1)
+
+        cache.delete("lock/view//page")
+        self.assertEqual(self.client.get("/page").data, b"build 2")
+
+    def test_missing_page_waits_for_rebuild(self):
+        """
+        GIVEN a purged page whose rebuild lock is held by another worker
+        WHEN it is requested and the lock times out
+        THEN the view is called as a fallback
+        """
+        cache.add("lock/view//page", "other worker")
+        self.assertEqual(self.client.get("/page").data, b"build 1")
+
+    def test_page_expires_at_next_show(self):
+        """
+        GIVEN a page whose next show starts in a minute
+        WHEN it is cached
+        THEN it is fresh until the show starts rather than for the default
+        timeout, and a purge during its first build keeps it out of the cache
+        """
+        self.assertEqual(self.client.get("/show").data, b"build 1")
+        self.assertIsNone(cache.get("view//show"))
+
+        self.assertEqual(self.client.get("/show").data, b"build 2")
+        fresh_until, rv = cache.get("view//show")
+        self.assertAlmostEqual(fresh_until, time.time() + 60, delta=5)
+
+    def test_generation_bumped_during_rebuild(self):
+        """
+        GIVEN a listing whose namespace is invalidated while it is built
+        WHEN the build finishes
+        THEN its result is served but not cached under either generation
+        """
+        before = generation("shows")
+        self.assertEqual(self.client.get("/listing").data, b"build 1")
+
+        self.assertIsNone(cache.get(f"view/shows/{before}/listing"))
+        self.assertIsNone(cache.get(f"view/shows/{generation('shows')}/listing"))
+        self.assertEqual(self.client.get("/listing").data, b"build 2")
+        self.assertEqual(self.client.get("/listing").data, b"build 2")
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    """This test case will test the in-process LRU cache"""
+
+    def test_lru_eviction_and_ttl(self):
+        """
+        GIVEN an LRU cache of two entries
+        WHEN a third entry is added and entries age past their ttl
+        THEN the least recently used entry and expired entries are gone
+        """
+        lru = LRUCache(maxsize=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertEqual((lru.get("a"), lru.get("b"), lru.get("c")), (1, None, 3))
+
+        lru.ttl = -1
+        lru.set("d", 4)
+        self.assertIsNone(lru.get("d"))
@@ -0,0 +1,159 @@
+import unittest
+from datetime import datetime, timezone
+
+from werkzeug.datastructures import MultiDict
+
+from app import create_app
+from database import db
+from models.models import Artist, Show, Venue
+from services.calendar import calendar_filters
+
+
+class CalendarTestCase(unittest.TestCase):
+    """This test case will test the show calendar"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.session.add_all(
+            [
+                Venue(name="The Musical Hop", city="San Francisco", state="CA"),
+                Venue(name="The Dueling Pianos Bar", city="New York", state="NY"),
+                Artist(name="Guns N Petals", genres=["Rock n Roll"]),
+                Artist(name="Matt Quevedo", genres=["Jazz"]),
+            ]
+        )
+        db.session.flush()
+        db.session.add_all(
+            [
+                Show(venue_id=1, artist_id=1, start_time=datetime(2030, 5, 24, 20)),
+                Show(venue_id=1, artist_id=2, start_time=datetime(2030, 5, 25, 21)),
+                Show(venue_id=2, artist_id=2, start_time=datetime(2030, 5, 25, 20)),
+                Show(venue_id=1, artist_id=1, start_time=datetime(2030, 6, 1, 20)),
+            ]
+        )
+        db.session.commit()
+        db.session.remove()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_calendar_filters(self):
+        """
+        GIVEN a window ending on a bare date
+        WHEN the calendar filters are parsed
+        THEN the window ends after that day, and an inverted one is rejected
+        """
+        filters = calendar_filters(
+            MultiDict({"from": "2030-05-24", "to": "2030-05-25", "state": "ca"})
+        )
+
+        self.assertEqual(filters["end"], datetime(2030, 5, 26))
+        self.assertEqual(filters["state"], "CA")
+        with self.assertRaises(ValueError):
+            calendar_filters(MultiDict({"from": "2030-05-25", "to": "2030-05-24"}))
+
+    def test_offset_window(self):
+        """
+        GIVEN a window starting at a UTC datetime and ending on a bare date
+        WHEN it is parsed and requested (GET)
+        THEN the start is converted to naive local time and the shows returned
+        """
+        aware = datetime(2030, 5, 24, tzinfo=timezone.utc)
+        filters = calendar_filters(
+            MultiDict({"from": aware.isoformat(), "to": "2030-06-30"})
+        )
+
+        self.assertEqual(filters["start"], aware.astimezone().replace(tzinfo=None))
+        for path in ("/shows", "/api/v1/shows"):
+            response = self.client.get(
+                path,
+                query_string={
+                    "from": "2030-05-24T00:00:00+00:00",
+                    "to": "2030-06-30",
+                    "format": "json",
+                },
+            )
+            self.assertEqual(response.status_code, 200, path)
+
+    def test_weekend_in_a_city(self):
+        """
+        GIVEN shows over two weekends in two cities
+        WHEN one weekend in San Francisco is requested as JSON (GET)
+        THEN only that weekend's San Francisco shows are returned, in order
+        """
+        response = self.client.get(
+            "/shows?from=2030-05-24&to=2030-05-25&city=San Francisco&format=json"
+        )
+        jazz = self.client.get("/shows?from=2030-05-24&genre=Jazz&format=json")
+
+        self.assertEqual(
+            [show["start_time"] for show in response.json["shows"]],
+            ["2030-05-24 20:00:00", "2030-05-25 21:00:00"],
+        )
+        self.assertEqual(
+            {show["artist_name"] for show in jazz.json["shows"]}, {"Matt Quevedo"}
+        )
+        self.assertEqual(self.client.get("/shows?from=someday").status_code, 400)
+
+    def test_ical(self):
+        """
+        GIVEN shows in a window
+        WHEN the window is requested as iCalendar (GET)
+        THEN one event per show is streamed
+        """
+        response = self.client.get("/shows?from=2030-05-25&to=2030-05-25&format=ics")
+        text = response.get_data(as_text=True)
+
+        self.assertEqual(response.mimetype, "text/calendar")
+        self.assertTrue(text.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertEqual(text.count("BEGIN:VEVENT"), 2)
+        self.assertIn("DTSTART:20300525T200000", text)
+        self.assertIn("LOCATION:The Dueling Pianos Bar\\, New York\\, NY", text)
+
+    def test_ical_folding(self):
+        """
+        GIVEN a venue with a long, non-ASCII name holding a carriage return
+        WHEN its shows are requested as iCalendar (GET)
+        THEN every line fits in 75 octets and unfolds to the escaped name
+        """
+        name = "Café Théâtre\r\nde la Musique Vivante, " * 3
+        Venue.query.get(2).name = name
+        db.session.commit()
+        db.session.remove()
+
+        response = self.client.get("/shows?from=2030-05-25&to=2030-05-25&format=ics")
+        body = response.get_data()
+        lines = body.split(b"\r\n")
+
+        self.assertNotIn(b"\r", body.replace(b"\r\n", b""))
+        self.assertLessEqual(max(len(line) for line in lines), 75)
+        # no character is split across lines
+        self.assertEqual([line.decode() for line in lines], body.decode().split("\r\n"))
+        unfolded = body.replace(b"\r\n ", b"").decode()
+        self.assertIn(
+            "LOCATION:" + name.replace("\r\n", "\\n").replace(",", "\\,"), unfolded
+        )
+
+    def test_ical_link(self):
+        """
+        GIVEN a shows page requested with a format and a cursor
+        WHEN it is rendered (GET)
+        THEN its iCal link keeps the filters and drops the format and cursor
+        """
+        first = self.client.get("/shows?format=json&limit=2&city=San Francisco")
+        response = self.client.get(
+            "/shows",
+            query_string={
+                "format": "html",
+                "city": "San Francisco",
+                "after": first.json["next"],
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'href="/shows?format=ics&amp;city=San+Francisco"', response.data)
@@ -0,0 +1,102 @@
+import importlib.util
+import tempfile
+import unittest
+
+from flask_caching.backends import FileSystemCache, SimpleCache
+from sqlalchemy.pool import NullPool
+
+from app import create_app
+from config import ProductionConfig, TestingConfig, engine_options
+from utils.caching import cache
+
+
+class EngineOptionsTestCase(unittest.TestCase):
+    """This test case will test the engine options of the config classes"""
+
+    def test_postgres_pool(self):
+        """
+        GIVEN a Postgres database
+        WHEN engine options are built
+        THEN the pool is sized, pinged, recycled and statements time out
+        """
+        options = engine_options("postgresql://localhost/fyyur", 10, 20, 5, 1800, 3000)
+
+        self.assertEqual(options["pool_size"], 10)
+        self.assertEqual(options["max_overflow"], 20)
+        self.assertEqual(options["pool_timeout"], 5)
+        self.assertTrue(options["pool_pre_ping"])
+        self.assertEqual(
+            options["connect_args"], {"options": "-c statement_timeout=3000"}
+        )
+
+    def test_pgbouncer(self):
+        """
+        GIVEN a Postgres database behind PgBouncer
+        WHEN engine options are built
+        THEN connections are not pooled and no startup options are sent
+        """
+        options = engine_options(
+            "postgresql://localhost/fyyur", 10, 20, 5, 1800, 3000, True
+        )
+
+        self.assertIs(options["poolclass"], NullPool)
+        self.assertNotIn("pool_size", options)
+        self.assertNotIn("connect_args", options)
+
+    def test_sqlite(self):
+        """
+        GIVEN a SQLite database
+        WHEN engine options are built
+        THEN the driver defaults are kept
+        """
+        self.assertEqual(engine_options("sqlite://", 10, 20, 5, 1800, 3000), {})
+
+
+class CacheBackendTestCase(unittest.TestCase):
+    """This test case will test the cache backend chosen by the config classes"""
+
+    def backend(self, app):
+        with app.app_context():
+            return cache.cache.backend
+
+    def app(self, **settings):
+        config = type("Config", (TestingConfig,), settings)
+        return create_app(config)
+
+    def test_backend_from_config(self):
+        """
+        GIVEN the config classes
+        WHEN an app is created from them
+        THEN production defaults to Redis and CACHE_TYPE picks the backend
+        """
+        self.assertEqual(ProductionConfig.CACHE_TYPE, "RedisCache")
+        self.assertIsInstance(self.backend(self.app()), SimpleCache)
+        with tempfile.TemporaryDirectory() as directory:
+            app = self.app(CACHE_TYPE="FileSystemCache", CACHE_DIR=directory)
+            self.assertIsInstance(self.backend(app), FileSystemCache)
+
+    @unittest.skipUnless(importlib.util.find_spec("redis"), "redis is not installed")
+    def test_key_prefix(self):
+        """
+        GIVEN a Redis cache and a key prefix
+        WHEN an app is created
+        THEN the backend prefixes its keys
+        """
+        app = self.app(CACHE_TYPE="RedisCache", CACHE_KEY_PREFIX="fyyur-test:")
+        self.assertEqual(self.backend(app).key_prefix, "fyyur-test:")
+
+    def test_shared_between_apps(self):
+        """
+        GIVEN two app instances, as in two workers on one host
+        WHEN one of them caches a value
+        THEN the other sees it through a FileSystemCache but not a SimpleCache
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            settings = {"CACHE_TYPE": "FileSystemCache", "CACHE_DIR": directory}
+            first, second = self.app(**settings), self.app(**settings)
+            self.backend(first).set("view//venues", "page")
+            self.assertEqual(self.backend(second).get("view//venues"), "page")
+
+        first, second = self.app(), self.app()
+        self.backend(first).set("view//venues", "page")
+        self.assertIsNone(self.backend(second).get("view//venues"))
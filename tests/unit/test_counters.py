@@ -0,0 +1,111 @@
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from database import db
+from models.models import Artist, Show, Venue
+from services.counters import recount
+from services.directory import venue_directory
+from utils.caching import cache, page_key
+from utils.querystats import collect
+
+
+class CountersTestCase(unittest.TestCase):
+    """This test case will test the stored show counters"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.now = datetime.now()
+        db.session.add_all(
+            [
+                Venue(name="Boiler Room", city="Chicago", genres="Jazz"),
+                Venue(name="The Pit", city="Chicago", genres="Punk"),
+                Artist(name="Miles", city="Chicago", genres="Jazz"),
+            ]
+        )
+        db.session.flush()
+        db.session.add_all(
+            [
+                Show(venue_id=1, artist_id=1, start_time=self.now + delta)
+                for delta in (timedelta(days=-1), timedelta(days=1), timedelta(days=2))
+            ]
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def counters(self, model, id):
+        db.session.expire_all()
+        row = model.query.get(id)
+        return row.upcoming_shows_count, row.past_shows_count, row.next_show_at
+
+    def test_counted_on_write(self):
+        """
+        GIVEN a venue with one past and two upcoming shows
+        WHEN a show moves to another venue and another is deleted
+        THEN both venues' counters and next shows follow
+        """
+        self.assertEqual(self.counters(Venue, 1), (2, 1, self.now + timedelta(days=1)))
+
+        Show.query.get(2).venue_id = 2
+        db.session.commit()
+        db.session.delete(Show.query.get(3))
+        db.session.commit()
+
+        self.assertEqual(self.counters(Venue, 1), (0, 1, None))
+        self.assertEqual(self.counters(Venue, 2), (1, 0, self.now + timedelta(days=1)))
+        self.assertEqual(self.counters(Artist, 1), (1, 1, self.now + timedelta(days=1)))
+
+    def test_reconcile(self):
+        """
+        GIVEN counters kept since before a show started
+        WHEN the reconciler runs after it started
+        THEN the show is moved from upcoming to past
+        """
+        later = self.now + timedelta(days=1, hours=1)
+        self.assertEqual(recount(db.session.connection(), Venue, Show.venue_id), 0)
+        updated = recount(db.session.connection(), Venue, Show.venue_id, now=later)
+        db.session.commit()
+
+        self.assertEqual(updated, 1)
+        self.assertEqual(self.counters(Venue, 1), (1, 2, self.now + timedelta(days=2)))
+        result = self.app.test_cli_runner().invoke(args=["reconcile-show-counts"])
+        self.assertIn("0 Venue rows recounted", result.output)
+
+    def test_reconcile_purges_pages(self):
+        """
+        GIVEN a cached venue page whose next show has started since it was
+        counted
+        WHEN the reconciler runs
+        THEN the page is purged along with the listings
+        """
+        db.session.execute(
+            Venue.__table__.update()
+            .where(Venue.id == 1)
+            .values(next_show_at=self.now - timedelta(hours=1))
+        )
+        db.session.commit()
+        self.app.test_client().get("/venues/1")
+        self.assertIsNotNone(cache.get(page_key("/venues/1")))
+
+        result = self.app.test_cli_runner().invoke(args=["reconcile-show-counts"])
+
+        self.assertIn("1 Venue rows recounted", result.output)
+        self.assertIsNone(cache.get(page_key("/venues/1")))
+
+    def test_directory_reads_counters(self):
+        """
+        GIVEN venues with stored counters
+        WHEN the venue directory is built
+        THEN the counts are read without touching Shows
+        """
+        with collect() as stats:
+            areas = venue_directory().items
+
+        self.assertEqual(areas[0]["venues"][0]["num_upcoming_shows"], 2)
+        self.assertFalse(any('"Shows"' in sql for sql in stats.statements))
@@ -0,0 +1,50 @@
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from database import db
+from models.models import Artist, Show, Venue
+from services.directory import venue_directory
+
+
+class DirectoryTestCase(unittest.TestCase):
+    """This test case will test the grouped venue directory"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_venue_directory(self):
+        """
+        GIVEN venues in two cities named Portland in different states
+        WHEN the venue directory is built
+        THEN each city/state pair is its own area with upcoming show counts
+        """
+        now = datetime(2022, 9, 19, 12, 0)
+        oregon = Venue(name="Crystal Ballroom", city="Portland", state="OR")
+        maine = Venue(name="State Theatre", city="Portland", state="ME")
+        artist = Artist(name="Guns N Petals")
+        db.session.add_all([oregon, maine, artist])
+        db.session.flush()
+        db.session.add_all(
+            [
+                Show(venue_id=oregon.id, artist_id=artist.id, start_time=now + delta)
+                for delta in (timedelta(days=-1), timedelta(days=1), timedelta(days=2))
+            ]
+        )
+        db.session.commit()
+
+        areas = venue_directory(now=now).items
+
+        self.assertEqual(
+            [(area["city"], area["state"]) for area in areas],
+            [("Portland", "ME"), ("Portland", "OR")],
+        )
+        self.assertEqual(areas[0]["venues"][0]["num_upcoming_shows"], 0)
+        self.assertEqual(areas[1]["venues"][0]["num_upcoming_shows"], 2)
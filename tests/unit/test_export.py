@@ -0,0 +1,103 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from app import create_app
+from database import db
+from models.models import Artist, Show, Venue
+
+
+class ExportTestCase(unittest.TestCase):
+    """This test case will test the bulk export"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.app.config.update(STREAM_BATCH_SIZE=2, EXPORT_TOKENS=["partner-token"])
+        self.auth = {"Authorization": "Bearer partner-token"}
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        venue = Venue(name="Boiler Room", city="Chicago", genres="{Jazz,Blues}")
+        artist = Artist(name="Miles", city="Chicago", genres="{Jazz}")
+        db.session.add_all([venue, artist])
+        db.session.flush()
+        for day in range(1, 6):
+            start_time = datetime(2030, 1, day)
+            db.session.add(
+                Show(venue_id=venue.id, artist_id=artist.id, start_time=start_time)
+            )
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_export_command(self):
+        """
+        GIVEN five shows and a batch size of two
+        WHEN the shows are exported to a gzipped file
+        THEN every show is written as one NDJSON line, in id order
+        """
+        output = os.path.join(tempfile.mkdtemp(), "shows.ndjson.gz")
+        result = self.app.test_cli_runner().invoke(
+            args=["export", "shows", "--output", output]
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        with gzip.open(output, "rt") as f:
+            shows = [json.loads(line) for line in f]
+        self.assertEqual([show["id"] for show in shows], [1, 2, 3, 4, 5])
+        self.assertEqual(shows[0]["start_time"], "2030-01-01 00:00:00")
+
+    def test_export_csv_endpoint(self):
+        """
+        GIVEN a partner client accepting gzip
+        WHEN the venues are exported as CSV (GET)
+        THEN a gzipped CSV stream of the public columns with the genres joined
+        is returned
+        """
+        response = self.app.test_client().get(
+            "/export/venues?format=csv",
+            headers={"Accept-Encoding": "gzip", **self.auth},
+        )
+
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        text = gzip.decompress(response.get_data()).decode()
+        rows = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual(rows[0]["name"], "Boiler Room")
+        self.assertEqual(rows[0]["genres"], "Jazz,Blues")
+        self.assertNotIn("search_text", rows[0])
+        self.assertNotIn("phone", rows[0])
+
+    def test_export_requires_token(self):
+        """
+        GIVEN the export endpoint
+        WHEN it is requested without a valid token, or no token is configured
+        (GET)
+        THEN a 401 or a 404 is returned
+        """
+        client = self.app.test_client()
+        wrong = {"Authorization": "Bearer guess"}
+
+        self.assertEqual(client.get("/export/venues").status_code, 401)
+        self.assertEqual(client.get("/export/venues", headers=wrong).status_code, 401)
+        self.app.config["EXPORT_TOKENS"] = []
+        response = client.get("/export/venues", headers=self.auth)
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_unknown_entity(self):
+        """
+        GIVEN an entity that cannot be exported
+        WHEN it is requested (GET)
+        THEN a 404 is returned
+        """
+        response = self.app.test_client().get("/export/users", headers=self.auth)
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,75 @@
+import unittest
+
+from app import create_app
+from database import db
+from models.models import Artist, Genre, Venue, artist_genres, genre_names
+
+
+class GenresTestCase(unittest.TestCase):
+    """This test case will test the Genre links and genre browsing"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.session.add_all(
+            [
+                Venue(name="Boiler Room", city="Chicago", genres=["Jazz", "Blues"]),
+                Venue(name="The Pit", city="Chicago", genres="{Punk}"),
+                Artist(name="Miles", city="Chicago", genres=["Jazz"]),
+                Artist(name="Ramones", city="New York", genres='{Punk,"Rock n Roll"}'),
+            ]
+        )
+        db.session.commit()
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_genre_names(self):
+        """
+        GIVEN genres as a form list, an array literal and a bare name
+        WHEN they are parsed
+        THEN the canonical Genre names are returned
+        """
+        self.assertEqual(genre_names(["HipHop", "Jazz"]), ["Hip-Hop", "Jazz"])
+        self.assertEqual(genre_names('{Jazz,"R&B",Nope}'), ["Jazz", "R&B"])
+        self.assertEqual(genre_names("Pop"), ["Pop"])
+        self.assertEqual(Genre.query.count(), 19)
+
+    def test_links_follow_writes(self):
+        """
+        GIVEN an artist linked to Jazz
+        WHEN its genres are changed
+        THEN its Genre links are replaced
+        """
+        artist = Artist.query.filter_by(name="Miles").one()
+        artist.genres = ["Blues", "Soul"]
+        db.session.commit()
+
+        links = db.session.query(Genre.name).join(
+            artist_genres, artist_genres.c.genre_id == Genre.id
+        )
+        links = links.filter(artist_genres.c.artist_id == artist.id)
+        self.assertEqual(sorted(name for name, in links), ["Blues", "Soul"])
+
+    def test_browse_by_genre(self):
+        """
+        GIVEN venues and artists of several genres
+        WHEN they are listed with ?genre= (GET)
+        THEN only those of that genre are returned
+        """
+        client = self.app.test_client()
+        venues = client.get("/venues?genre=jazz&format=json").json["areas"]
+        artists = client.get("/artists?genre=Rock n Roll&format=json").json["artists"]
+        streamed = client.get("/artists?genre=Jazz&stream=1").data
+
+        self.assertEqual(
+            [venue["name"] for area in venues for venue in area["venues"]],
+            ["Boiler Room"],
+        )
+        self.assertEqual([artist["name"] for artist in artists], ["Ramones"])
+        self.assertIn(b"Miles", streamed)
+        self.assertNotIn(b"Ramones", streamed)
@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app import create_app
+from database import db
+from models.models import Artist, Show, Venue, with_genre
+from utils.querystats import collect
+
+
+class ImporterTestCase(unittest.TestCase):
+    """This test case will test the bulk import command"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def invoke(self, *args):
+        return self.app.test_cli_runner().invoke(args=["import", *args])
+
+    def test_import_venues_csv(self):
+        """
+        GIVEN a CSV file with a valid, an invalid and a repeated venue
+        WHEN it is imported
+        THEN only the valid venue is inserted and the others are reported
+        """
+        path = self.write(
+            "venues.csv",
+            "name,city,state,address,phone,genres,facebook_link\n"
+            "Boiler Room,Chicago,IL,1 Main St,312-555-0100,Jazz;Blues,"
+            "https://www.facebook.com/boiler\n"
+            "Bad Phone,Chicago,IL,2 Main St,call me,Jazz,"
+            "https://www.facebook.com/bad\n"
+            "Boiler Room,Chicago,IL,1 Main St,312-555-0100,Jazz,"
+            "https://www.facebook.com/boiler\n",
+        )
+        result = self.invoke("venues", path)
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("Imported 1 venues", result.output)
+        self.assertIn("line 3: Invalid phone number", result.output)
+        self.assertIn("line 4: Venue already exists", result.output)
+        venue = Venue.query.one()
+        self.assertEqual(venue.genres, "{Jazz,Blues}")
+        self.assertIn("blues", venue.search_text)
+
+    def test_import_artists_jsonl(self):
+        """
+        GIVEN a JSONL file of artists
+        WHEN it is imported in batches
+        THEN every artist is inserted with one statement per batch and linked
+        to its own genres
+        """
+        lines = [
+            {
+                "name": f"Artist {n}",
+                "city": "Chicago",
+                "state": "IL",
+                "phone": "312-555-0100",
+                "genres": ["Jazz" if n % 2 else "Blues"],
+                "facebook_link": "https://www.facebook.com/artist",
+                "seeking_venue": True,
+            }
+            for n in range(5)
+        ]
+        path = self.write(
+            "artists.jsonl", "".join(json.dumps(line) + "\n" for line in lines)
+        )
+        with collect() as stats:
+            result = self.invoke("artists", path, "--batch-size", "2")
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(Artist.query.filter_by(seeking_venue=True).count(), 5)
+        inserts = sum(
+            n for sql, n in stats.statements.items() if 'INSERT INTO "Artist"' in sql
+        )
+        self.assertEqual(inserts, 3)
+        jazz = with_genre(db.session.query(Artist.name), Artist, "Jazz")
+        self.assertEqual({name for name, in jazz}, {"Artist 1", "Artist 3"})
+
+    def test_import_malformed_jsonl(self):
+        """
+        GIVEN a JSONL file with a truncated line and a line that is no object
+        WHEN it is imported
+        THEN those lines are rejected and the rest is imported
+        """
+        line = {
+            "name": "Miles",
+            "city": "Chicago",
+            "state": "IL",
+            "phone": "312-555-0100",
+            "genres": ["Jazz"],
+            "facebook_link": "https://www.facebook.com/miles",
+        }
+        path = self.write(
+            "artists.jsonl",
+            json.dumps(line) + '\n{"name": "Tru\n[1, 2]\n' + json.dumps(line) + "\n",
+        )
+        result = self.invoke("artists", path)
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("line 2: Invalid JSON", result.output)
+        self.assertIn("line 3: Not a JSON object", result.output)
+        self.assertEqual(Artist.query.count(), 2)
+
+    def test_import_shows_by_name(self):
+        """
+        GIVEN a CSV file of shows naming their venue and artist
+        WHEN it is imported
+        THEN the names are resolved and unknown ones are rejected
+        """
+        db.session.add(Venue(name="Boiler Room", city="Chicago", genres="Jazz"))
+        db.session.add(Artist(name="Miles", city="Chicago", genres="Jazz"))
+        db.session.commit()
+        path = self.write(
+            "shows.csv",
+            "venue,artist,start_time\n"
+            "Boiler Room,Miles,2030-01-01T20:00:00\n"
+            "Boiler Room,Miles,Jan 2 2030 8pm\n"
+            "Nowhere,Miles,2030-01-03T20:00:00\n",
+        )
+        errors = os.path.join(self.directory, "errors.tsv")
+        result = self.invoke("shows", path, "--errors", errors)
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertEqual(Show.query.count(), 2)
+        with open(errors) as f:
+            self.assertTrue(f.read().startswith("4\t"))
@@ -0,0 +1,94 @@
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from database import db
+from models.models import Artist, Show, Venue
+from utils.caching import cache, page_key
+
+
+class InvalidationTestCase(unittest.TestCase):
+    """This test case will test that writes purge the cached pages they affect"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+
+        venue = Venue(
+            name="The Musical Hop", city="San Francisco", state="CA", genres="Jazz"
+        )
+        artist = Artist(
+            name="Guns N Petals", city="San Francisco", state="CA", genres="Jazz"
+        )
+        db.session.add_all([venue, artist])
+        db.session.commit()
+        self.venue_id, self.artist_id = venue.id, artist.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_venue_update_purges_pages(self):
+        """
+        GIVEN cached venue and venue listing pages
+        WHEN the venue is renamed
+        THEN both pages show the new name
+        """
+        self.assertIn(b"The Musical Hop", self.client.get("/venues").data)
+        self.assertIn(
+            b"The Musical Hop", self.client.get(f"/venues/{self.venue_id}").data
+        )
+
+        venue = Venue.query.get(self.venue_id)
+        venue.name = "The Dueling Pianos Bar"
+        db.session.commit()
+
+        self.assertIn(b"The Dueling Pianos Bar", self.client.get("/venues").data)
+        self.assertIn(
+            b"The Dueling Pianos Bar", self.client.get(f"/venues/{self.venue_id}").data
+        )
+
+    def test_new_show_purges_pages(self):
+        """
+        GIVEN cached venue, artist and show pages without shows
+        WHEN a show is listed
+        THEN the show appears on all of them
+        """
+        self.assertNotIn(b"tile-show", self.client.get("/shows").data)
+        for path in (f"/venues/{self.venue_id}", f"/artists/{self.artist_id}"):
+            self.assertIn(b"0 Upcoming Shows", self.client.get(path).data)
+
+        db.session.add(
+            Show(
+                venue_id=self.venue_id,
+                artist_id=self.artist_id,
+                start_time=datetime.now() + timedelta(days=1),
+            )
+        )
+        db.session.commit()
+
+        self.assertIn(b"tile-show", self.client.get("/shows").data)
+        self.assertIn(
+            b"1 Upcoming Show", self.client.get(f"/venues/{self.venue_id}").data
+        )
+        self.assertIn(
+            b"1 Upcoming Show", self.client.get(f"/artists/{self.artist_id}").data
+        )
+
+    def test_rollback_keeps_pages(self):
+        """
+        GIVEN a cached venue page
+        WHEN a rename is rolled back
+        THEN the cached page is kept
+        """
+        key = page_key(f"/venues/{self.venue_id}")
+        self.client.get(f"/venues/{self.venue_id}")
+        venue = Venue.query.get(self.venue_id)
+        venue.name = "Never committed"
+        db.session.flush()
+        db.session.rollback()
+
+        self.assertIsNotNone(cache.get(key))
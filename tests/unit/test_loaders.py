@@ -0,0 +1,89 @@
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from database import db
+from models.models import Artist, Show, Venue
+from services.loaders import load_artist, load_venue
+from utils.querystats import query_budget
+
+
+class LoadersTestCase(unittest.TestCase):
+    """This test case will test the single-query detail page loaders"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.now = datetime(2022, 9, 19, 12, 0)
+
+        self.venue = Venue(
+            name="Boiler Room", city="Chicago", state="IL", genres="Jazz"
+        )
+        self.artists = [Artist(name=f"Artist {i}", genres="Jazz") for i in range(10)]
+        db.session.add(self.venue)
+        db.session.add_all(self.artists)
+        db.session.flush()
+        for i, artist in enumerate(self.artists):
+            db.session.add(
+                Show(
+                    venue_id=self.venue.id,
+                    artist_id=artist.id,
+                    start_time=self.now + timedelta(days=i - 3),
+                )
+            )
+        db.session.commit()
+        self.venue_id = self.venue.id
+        self.artist_id = self.artists[0].id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_load_venue(self):
+        """
+        GIVEN a venue with ten shows by ten different artists
+        WHEN the venue is loaded
+        THEN shows are split around now and a single query is issued
+        """
+        with query_budget(max_queries=1):
+            venue = load_venue(self.venue_id, now=self.now)
+
+        self.assertEqual(venue["name"], "Boiler Room")
+        self.assertEqual(venue["past_shows_count"], 4)
+        self.assertEqual(venue["upcoming_shows_count"], 6)
+        self.assertEqual(venue["upcoming_shows"][0]["artist_name"], "Artist 4")
+
+    def test_load_artist(self):
+        """
+        GIVEN an artist with a single past show
+        WHEN the artist is loaded
+        THEN the venue is joined in and a single query is issued
+        """
+        with query_budget(max_queries=1):
+            artist = load_artist(self.artist_id, now=self.now)
+
+        self.assertEqual(artist["past_shows_count"], 1)
+        self.assertEqual(artist["upcoming_shows_count"], 0)
+        self.assertEqual(artist["past_shows"][0]["venue_name"], "Boiler Room")
+
+    def test_load_missing(self):
+        """
+        GIVEN an empty id
+        WHEN it is loaded
+        THEN None is returned
+        """
+        self.assertIsNone(load_venue(999))
+        self.assertIsNone(load_artist(999))
+
+    def test_detail_page(self):
+        """
+        GIVEN a Flask application configured for testing
+        WHEN the venue and artist pages are requested (GET)
+        THEN check the responses are valid
+        """
+        client = self.app.test_client()
+        self.assertIn(b"Boiler Room", client.get(f"/venues/{self.venue_id}").data)
+        self.assertIn(b"Artist 0", client.get(f"/artists/{self.artist_id}").data)
+        self.assertEqual(client.get("/venues/999").status_code, 404)
@@ -0,0 +1,63 @@
+import unittest
+
+from app import create_app
+from database import db
+from models.models import Venue
+
+
+class MetricsTestCase(unittest.TestCase):
+    """This test case will test the Prometheus metrics endpoint"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.session.add(Venue(name="Boiler Room", city="Chicago", genres="Jazz"))
+        db.session.commit()
+        self.app.config["METRICS_TOKEN"] = "scraper"
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_metrics(self):
+        """
+        GIVEN a Flask application configured for testing
+        WHEN a venue page is requested twice and then /metrics (GET)
+        THEN latency, render time, cache and pool metrics are exposed
+        """
+        client = self.app.test_client()
+        client.get("/venues/1")
+        client.get("/venues/1")
+        response = client.get("/metrics", headers={"Authorization": "Bearer scraper"})
+        body = response.get_data(as_text=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'fyyur_request_duration_seconds_count{endpoint="routes.show_venue",'
+            'method="GET",status="200"}',
+            body,
+        )
+        self.assertIn(
+            'fyyur_template_render_seconds_count{template="pages/show_venue.html"}',
+            body,
+        )
+        self.assertIn('fyyur_cache_requests_total{kind="view",result="hit"}', body)
+        self.assertIn('fyyur_cache_requests_total{kind="view",result="miss"}', body)
+        self.assertIn('fyyur_db_pool_checkout_seconds_count{bind="default"}', body)
+
+    def test_metrics_token(self):
+        """
+        GIVEN a Flask application configured for testing
+        WHEN /metrics is requested without or with a wrong token, or with no
+        token configured (GET)
+        THEN it is refused, or not found
+        """
+        client = self.app.test_client()
+        self.assertEqual(client.get("/metrics").status_code, 401)
+        wrong = {"Authorization": "Bearer guess"}
+        self.assertEqual(client.get("/metrics", headers=wrong).status_code, 401)
+
+        self.app.config["METRICS_TOKEN"] = ""
+        self.assertEqual(client.get("/metrics").status_code, 404)
@@ -11,7 +11,7 @@ class FyyurTestCase(unittest.TestCase):
     """This test case will test the models and functionality of the Fyyur app"""
 
     def setUp(self):
-        self.app = create_app()
+        self.app = create_app("config.TestingConfig")
         self.client = self.app.test_client
 
     def tearDown(self):
@@ -0,0 +1,120 @@
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from database import db
+from models.models import Artist, Show, Venue
+from services.listings import show_listing
+from services.pagination import decode_cursor, encode_cursor
+
+
+class PaginationTestCase(unittest.TestCase):
+    """This test case will test keyset pagination of the listings"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+        venue = Venue(name="The Musical Hop", city="San Francisco", state="CA")
+        artist = Artist(name="Guns N Petals")
+        db.session.add_all([venue, artist])
+        db.session.flush()
+        start = datetime(2022, 9, 19, 12, 0)
+        # shows 2 and 3 share a start time so the id has to break the tie
+        for days in (0, 1, 1, 2, 3):
+            db.session.add(
+                Show(
+                    venue_id=venue.id,
+                    artist_id=artist.id,
+                    start_time=start + timedelta(days=days),
+                )
+            )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_show_listing_pages(self):
+        """
+        GIVEN five shows and a page size of two
+        WHEN the listing is paged forwards and back again
+        THEN every show is seen exactly once and the pages line up
+        """
+        first = show_listing(limit=2)
+        second = show_listing(after=first.next_cursor, limit=2)
+        third = show_listing(after=second.next_cursor, limit=2)
+
+        self.assertIsNone(first.prev_cursor)
+        self.assertIsNone(third.next_cursor)
+        times = [
+            show["start_time"] for page in (first, second, third) for show in page.items
+        ]
+        self.assertEqual(len(times), 5)
+        self.assertEqual(times, sorted(times))
+
+        back = show_listing(before=third.prev_cursor, limit=2)
+        self.assertEqual(back.items, second.items)
+        self.assertEqual(
+            show_listing(before=back.prev_cursor, limit=2).items, first.items
+        )
+
+    def test_listing_views(self):
+        """
+        GIVEN a Flask application configured for testing
+        WHEN the listings are requested as JSON or with a bad cursor
+        THEN the page and its cursors are returned or the request is rejected
+        """
+        client = self.app.test_client()
+        data = client.get("/shows?format=json&limit=2").get_json()
+        self.assertEqual(len(data["shows"]), 2)
+        self.assertIsNotNone(data["next"])
+        page = client.get("/shows?limit=2").data
+        self.assertIn(b"Next", page)
+        self.assertEqual(page.count(b'class="pager"'), 1)
+        self.assertIn(b"<title>Fyyur | Shows</title>", page)
+        self.assertEqual(
+            len(client.get("/artists?format=json").get_json()["artists"]), 1
+        )
+        self.assertEqual(
+            client.get("/venues?format=json").get_json()["areas"][0]["city"],
+            "San Francisco",
+        )
+        self.assertEqual(client.get("/shows?after=bogus").status_code, 400)
+
+    def test_crafted_cursors(self):
+        """
+        GIVEN cursors whose key values have the wrong types
+        WHEN they are decoded or used on a listing (GET)
+        THEN they are rejected before reaching the database
+        """
+        columns = [Artist.name, Artist.id]
+        self.assertEqual(decode_cursor(encode_cursor(["a", 1]), columns), ["a", 1])
+        for values in (["x", "abc"], ["x", True], [1, 1], {"name": "x"}):
+            with self.assertRaises(ValueError, msg=values):
+                decode_cursor(encode_cursor(values), columns)
+
+        client = self.app.test_client()
+        for path, values in (
+            ("/artists", ["x", "abc"]),
+            ("/shows", [7, 1]),
+            ("/venues", [["x"], 1]),
+        ):
+            response = client.get(path, query_string={"after": encode_cursor(values)})
+            self.assertEqual(response.status_code, 400, path)
+
+    def test_streamed_listings(self):
+        """
+        GIVEN a Flask application configured for testing
+        WHEN the listings are requested with ?stream=1
+        THEN every row is streamed without a pager
+        """
+        client = self.app.test_client()
+        response = client.get("/shows?stream=1")
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.data.count(b"tile-show"), 5)
+        self.assertNotIn(b"pager", response.data)
+        self.assertIn(b"San Francisco", client.get("/venues?stream=1").data)
+        self.assertIn(b"Guns N Petals", client.get("/artists?stream=1").data)
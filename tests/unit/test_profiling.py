@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+
+from app import create_app
+from database import db
+from models.models import Artist
+
+
+class ProfilingTestCase(unittest.TestCase):
+    """This test case will test the request profiler"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.app.config.update(
+            PROFILE_DIR=tempfile.mkdtemp(), PROFILE_SECRET="not-so-secret"
+        )
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.session.add(Artist(name="Guns N Petals", genres="Rock n Roll"))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_signed_header(self):
+        """
+        GIVEN a profile token from the command line
+        WHEN an artist page is requested with and without a valid token (GET)
+        THEN only the signed request is profiled and reported as collapsed stacks
+        """
+        runner = self.app.test_cli_runner()
+        token = runner.invoke(args=["profile-token"]).output.strip()
+        client = self.app.test_client()
+        client.get("/artists/1", headers={"X-Fyyur-Profile": "forged"})
+        client.get("/artists/1", headers={"X-Fyyur-Profile": token})
+
+        result = runner.invoke(args=["profile-report"])
+        lines = result.output.splitlines()
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertTrue(lines)
+        self.assertTrue(all(line.startswith("routes.show_artist;") for line in lines))
+        self.assertTrue(any("show_artist" in line.split(" ")[0] for line in lines))
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+
+    def test_sample_rate(self):
+        """
+        GIVEN a zero profile rate and no token
+        WHEN a page is requested (GET)
+        THEN nothing is profiled
+        """
+        self.app.test_client().get("/artists/1")
+        result = self.app.test_cli_runner().invoke(args=["profile-report"])
+
+        self.assertEqual(result.output, "")
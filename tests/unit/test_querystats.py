@@ -0,0 +1,89 @@
+import unittest
+
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from database import db
+from models.models import Venue
+from utils.querystats import fingerprint, query_budget
+
+
+class QueryStatsTestCase(unittest.TestCase):
+    """This test case will test the per-request query statistics"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.session.add_all(
+            [
+                Venue(name=f"Venue {i}", city="Chicago", state="IL", genres="Jazz")
+                for i in range(3)
+            ]
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_fingerprint(self):
+        """
+        GIVEN statements differing only in their values
+        WHEN they are fingerprinted
+        THEN the fingerprints are equal
+        """
+        self.assertEqual(
+            fingerprint("SELECT * FROM venue WHERE id IN (?, ?, ?) AND name = 'a'"),
+            fingerprint("SELECT * FROM venue\n WHERE id IN (?) AND name = 'b''c'"),
+        )
+        self.assertEqual(
+            fingerprint("SELECT * FROM venue LIMIT 10"), "SELECT * FROM venue LIMIT ?"
+        )
+
+    def test_query_budget(self):
+        """
+        GIVEN a block running the same statement three times
+        WHEN it runs under a query budget
+        THEN statements are counted and exceeding the budget fails
+        """
+        with query_budget(max_queries=3) as stats:
+            for id in range(1, 4):
+                Venue.query.filter_by(id=id).first()
+        self.assertEqual(stats.count, 3)
+        self.assertEqual(stats.repeated(2), [(next(iter(stats.statements)), 3)])
+
+        with self.assertRaises(AssertionError):
+            with query_budget(max_repeats=1):
+                for id in range(1, 4):
+                    Venue.query.filter_by(id=id).first()
+
+    def test_server_timing(self):
+        """
+        GIVEN a Flask application configured for testing
+        WHEN a page is requested (GET)
+        THEN the response reports its queries in a Server-Timing header
+        """
+        response = self.app.test_client().get("/venues/1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response.headers["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries"$'
+        )
+
+    def test_failed_statement(self):
+        """
+        GIVEN a statement that fails
+        WHEN the next statement runs on the same connection
+        THEN the failed one left no start time behind and the next is timed
+        """
+        connection = db.session.connection()
+        with self.assertRaises(OperationalError):
+            connection.execute("SELECT * FROM missing")
+        self.assertEqual(connection.info["query_start"], [])
+
+        with query_budget() as stats:
+            connection.execute("SELECT 1")
+        self.assertEqual(stats.count, 1)
+        self.assertEqual(connection.info["query_start"], [])
@@ -0,0 +1,166 @@
+import os
+import runpy
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from app import create_app
+from config import TestingConfig
+from database import db, read_replica
+from models.models import Venue
+from utils.caching import cache
+
+
+class ReplicaTestingConfig(TestingConfig):
+    directory = tempfile.mkdtemp()
+    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'primary.db')}"
+    SQLALCHEMY_BINDS = {"replica": f"sqlite:///{os.path.join(directory, 'replica.db')}"}
+
+
+class ReplicaTestCase(unittest.TestCase):
+    """This test case will test read/write splitting with two SQLite databases"""
+
+    def setUp(self):
+        self.app = create_app(ReplicaTestingConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.session.add(Venue(name="On Primary", city="Chicago", genres="Jazz"))
+        db.session.commit()
+        # a real replica gets the schema and rows by replication
+        self.replica = db.get_engine(self.app, bind="replica")
+        db.Model.metadata.create_all(bind=self.replica)
+        self.replica.execute(
+            Venue.__table__.insert(),
+            {"name": "On Replica", "city": "Chicago", "genres": "Jazz"},
+        )
+        db.session.remove()
+        cache.clear()
+        self.client = self.app.test_client()
+
+        @self.app.route("/rename", methods=["POST"])
+        def rename_venue():
+            Venue.query.get(1).name = "Renamed"
+            db.session.commit()
+            return ""
+
+        @self.app.route("/name")
+        @read_replica
+        def venue_name():
+            return db.session.query(Venue.name).filter_by(id=1).scalar()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.Model.metadata.drop_all(bind=self.replica)
+        self.ctx.pop()
+
+    def test_reads_go_to_replica(self):
+        """
+        GIVEN a venue that differs between primary and replica
+        WHEN its page is requested (GET)
+        THEN it is read from the replica
+        """
+        self.assertIn(b"On Replica", self.client.get("/venues/1").data)
+
+    def test_read_your_writes(self):
+        """
+        GIVEN a write committed by one client
+        WHEN it and another client read right after (GET)
+        THEN the writer reads from the primary and the other from the replica
+        """
+        self.client.post("/rename")
+        db.session.remove()
+
+        self.assertEqual(self.client.get("/name").data, b"Renamed")
+        self.assertEqual(self.app.test_client().get("/name").data, b"On Replica")
+
+    def test_writer_skips_pages_cached_from_replica(self):
+        """
+        GIVEN a write committed by one client
+        WHEN another client rebuilds the cached page and search results from
+        the replica, and the writer then reads them (GET)
+        THEN the writer still reads its own write from the primary
+        """
+        self.client.post("/rename")
+        db.session.remove()
+        other = self.app.test_client()
+
+        self.assertIn(b"On Replica", other.get("/venues/1").data)
+        self.assertNotIn(b"Renamed", other.get("/venues?format=json").data)
+        self.assertNotIn(
+            b"Renamed", other.get("/venues/search?search_term=renamed").data
+        )
+        db.session.remove()
+
+        self.assertIn(b"Renamed", self.client.get("/venues/1").data)
+        self.assertIn(b"Renamed", self.client.get("/venues?format=json").data)
+        self.assertIn(
+            b"Renamed", self.client.get("/venues/search?search_term=renamed").data
+        )
+
+    def test_pages_cached_after_write_expire(self):
+        """
+        GIVEN a write committed by one client
+        WHEN another client rebuilds a cached page from the replica (GET)
+        THEN the page is only fresh until the write has replicated
+        """
+        self.client.post("/rename")
+        db.session.remove()
+        self.assertIn(b"On Replica", self.app.test_client().get("/venues/1").data)
+
+        fresh_until, rv = cache.get("view//venues/1")
+        pin = self.app.config["REPLICA_PIN_SECONDS"]
+        self.assertLessEqual(fresh_until, time.time() + pin)
+
+    def test_writes_go_to_primary(self):
+        """
+        GIVEN a read-only view
+        WHEN it writes
+        THEN the flush and the reads after it use the primary
+        """
+
+        @self.app.route("/rename")
+        @read_replica
+        def rename():
+            Venue.query.get(1).name = "Renamed"
+            db.session.flush()
+            return db.session.query(Venue.name).filter_by(id=1).scalar()
+
+        response = self.client.get("/rename")
+
+        self.assertEqual(response.data, b"Renamed")
+
+    def test_replica_pool_metrics(self):
+        """
+        GIVEN a page read from the replica
+        WHEN the metrics are scraped with the scraper's token (GET)
+        THEN the replica's pool is reported next to the primary's
+        """
+        self.app.config["METRICS_TOKEN"] = "scraper"
+        self.client.get("/venues/1")
+        response = self.client.get(
+            "/metrics", headers={"Authorization": "Bearer scraper"}
+        )
+
+        self.assertIn(
+            'fyyur_db_pool_checkout_seconds_count{bind="replica"}',
+            response.get_data(as_text=True),
+        )
+
+    def test_post_fork_disposes_every_engine(self):
+        """
+        GIVEN pools on the primary and the replica opened before a fork
+        WHEN gunicorn's post_fork hook runs in the worker
+        THEN both pools are replaced rather than shared with the master
+        """
+        gunicorn_conf = runpy.run_path(
+            os.path.join(os.path.dirname(__file__), "..", "..", "gunicorn.conf.py")
+        )
+        pools = {db.engine: db.engine.pool, self.replica: self.replica.pool}
+        server = SimpleNamespace(app=SimpleNamespace(wsgi=lambda: self.app))
+
+        gunicorn_conf["post_fork"](server, None)
+
+        for engine, pool in pools.items():
+            self.assertIsNot(engine.pool, pool)
@@ -0,0 +1,147 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app import create_app
+from database import db
+from models.models import Artist, Show, Venue
+from services.search import (
+    INDEX_NAMESPACE,
+    InvertedIndex,
+    search_artists,
+    search_venues,
+)
+from utils.caching import bump_generation, generation
+
+
+class SearchTestCase(unittest.TestCase):
+    """This test case will test venue and artist search"""
+
+    def setUp(self):
+        self.app = create_app("config.TestingConfig")
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.now = datetime(2022, 9, 19, 12, 0)
+
+        venues = [
+            Venue(name="The Musical Hop", city="San Francisco", state="CA"),
+            Venue(
+                name="Park Square Live Music & Coffee", city="San Francisco", state="CA"
+            ),
+            Venue(name="The Dueling Pianos Bar", city="New York", state="NY"),
+        ]
+        artist = Artist(name="Guns N Petals", city="San Francisco", state="CA")
+        db.session.add_all(venues + [artist])
+        db.session.flush()
+        db.session.add(
+            Show(
+                venue_id=venues[1].id,
+                artist_id=artist.id,
+                start_time=self.now + timedelta(days=1),
+            )
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_inverted_index(self):
+        """
+        GIVEN an inverted index with two documents
+        WHEN it is searched for a partial token
+        THEN documents containing the substring are returned, exact words first
+        """
+        index = InvertedIndex()
+        index.add(1, "musical hop san francisco ca")
+        index.add(2, "hop music")
+        self.assertEqual(index.search(["music"]), [(2, 2), (1, 1)])
+        index.remove(2)
+        self.assertEqual(index.search(["music"]), [(1, 1)])
+
+    def test_search_venues(self):
+        """
+        GIVEN venues named after music in two cities
+        WHEN venues are searched for a partial name and a city
+        THEN matches are ranked and carry their upcoming show count
+        """
+        results = search_venues("Music san francisco", now=self.now)
+
+        self.assertEqual(results["count"], 2)
+        self.assertEqual(results["data"][0]["name"], "Park Square Live Music & Coffee")
+        self.assertEqual(results["data"][0]["num_upcoming_shows"], 1)
+        self.assertEqual(results["data"][1]["num_upcoming_shows"], 0)
+
+    def test_search_index_follows_writes(self):
+        """
+        GIVEN an artist search that has built the index
+        WHEN a new artist is committed
+        THEN the next search finds it
+        """
+        self.assertEqual(search_artists("petals")["count"], 1)
+        db.session.add(Artist(name="Matt Quevedo", city="New York", state="NY"))
+        db.session.commit()
+        self.assertEqual(search_artists("new york")["count"], 1)
+        self.assertEqual(search_artists("")["count"], 2)
+
+    def test_search_index_generation(self):
+        """
+        GIVEN an artist search that has built the index
+        WHEN an artist is inserted past the ORM and the index generation bumped,
+        as a bulk import in another process does
+        THEN the next search rebuilds the index and finds it
+        """
+        self.assertEqual(search_artists("quevedo", now=self.now)["count"], 0)
+        db.session.execute(
+            Artist.__table__.insert(),
+            {"name": "Matt Quevedo", "genres": "{}", "search_text": "matt quevedo"},
+        )
+        db.session.commit()
+        self.assertEqual(search_artists("quevedo", now=self.now)["count"], 0)
+
+        bump_generation(INDEX_NAMESPACE)
+        self.assertEqual(search_artists("quevedo", now=self.now)["count"], 1)
+
+    def test_writes_bump_index_generation(self):
+        """
+        GIVEN an artist search that has built the index
+        WHEN an artist is renamed, and then only their phone number changed
+        THEN the rename bumps the index generation every worker checks, so
+        their indexes are rebuilt, and the phone number does not
+        """
+        self.assertEqual(search_artists("petals", now=self.now)["count"], 1)
+        before = generation(INDEX_NAMESPACE)
+
+        artist = Artist.query.filter_by(name="Guns N Petals").one()
+        artist.name = "Guns N Roses"
+        db.session.commit()
+        renamed = generation(INDEX_NAMESPACE)
+        self.assertNotEqual(renamed, before)
+        self.assertEqual(search_artists("roses", now=self.now)["count"], 1)
+
+        artist.phone = "326-123-5000"
+        db.session.commit()
+        self.assertEqual(generation(INDEX_NAMESPACE), renamed)
+
+    def test_search_views(self):
+        """
+        GIVEN a Flask application configured for testing
+        WHEN different terms are searched for with GET
+        THEN each term gets its own results and repeats are served from cache
+        """
+        client = self.app.test_client()
+        hop = client.get("/venues/search?search_term=Hop").data
+        self.assertIn(b"The Musical Hop", hop)
+        self.assertNotIn(b"Dueling", hop)
+        self.assertIn(b"Dueling", client.get("/venues/search?search_term=pianos").data)
+
+        statements = []
+        event.listen(
+            db.engine, "before_cursor_execute", lambda *args: statements.append(args)
+        )
+        self.assertIn(
+            b"The Musical Hop", client.get("/venues/search?search_term=  HOP!").data
+        )
+        self.assertEqual(statements, [])
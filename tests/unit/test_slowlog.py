@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app import create_app
+from config import TestingConfig
+from database import db
+from models.models import Venue
+from utils import slowlog
+
+
+class SlowLogTestCase(unittest.TestCase):
+    """This test case will test the slow query log"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        # plans are taken on a connection of their own, which an in-memory
+        # database would not share
+        config = type(
+            "Config",
+            (TestingConfig,),
+            {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{directory}/fyyur.db"},
+        )
+        self.app = create_app(config)
+        self.log = os.path.join(directory, "slow_queries.log")
+        self.app.config.update(
+            SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_EXPLAIN_RATE=1, SLOW_QUERY_LOG=self.log
+        )
+        slowlog.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.session.add(Venue(name="Boiler Room", city="Chicago", genres="Jazz"))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.app.extensions["slow_query_log"].close()
+
+    def test_slow_query_log(self):
+        """
+        GIVEN a zero slow query threshold
+        WHEN a venue page is requested (GET)
+        THEN its statements are logged with the view and a query plan
+        """
+        self.app.test_client().get("/venues/1")
+        slowlog.wait_for_plans()
+        with open(self.log) as f:
+            entries = [json.loads(line) for line in f]
+
+        selects = [e for e in entries if e["endpoint"] == "routes.show_venue"]
+        self.assertTrue(selects)
+        self.assertEqual(selects[0]["parameters"], [1])
+        self.assertIn("venue", selects[0]["plan"].lower())
+
+    def test_summary(self):
+        """
+        GIVEN a slow query log
+        WHEN it is summarized from the command line
+        THEN the statements are listed by total time
+        """
+        self.app.test_client().get("/venues/1")
+        slowlog.wait_for_plans()
+        result = self.app.test_cli_runner().invoke(args=["slow-queries", "--top", "1"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("ms total", result.output)
+        self.assertEqual(len(result.output.splitlines()), 2)
+
+    def test_rotated_log(self):
+        """
+        GIVEN a slow query log moved away by an external rotation
+        WHEN more statements are logged
+        THEN they go to a new file at the configured path
+        """
+        self.app.test_client().get("/venues/1")
+        slowlog.wait_for_plans()
+        os.rename(self.log, f"{self.log}.1")
+
+        Venue.query.all()
+        slowlog.wait_for_plans()
+
+        with open(f"{self.log}.1") as rotated, open(self.log) as current:
+            lines = len(rotated.readlines()), len(current.readlines())
+        self.assertTrue(all(lines))
+        self.assertEqual(len(list(slowlog.read_entries(self.log, 1))), sum(lines))
+
+    def test_failed_explain(self):
+        """
+        GIVEN a sampled statement whose plan cannot be taken
+        WHEN it is explained
+        THEN the failure is logged and the request's transaction is unaffected
+        """
+        db.session.add(Venue(name="The Pit", city="Chicago", genres="Punk"))
+        db.session.flush()
+
+        plan = slowlog.explain(db.engine, "SELECT * FROM missing", ())
+
+        self.assertTrue(plan.startswith("EXPLAIN failed"))
+        self.assertEqual(Venue.query.count(), 2)
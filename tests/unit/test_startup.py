@@ -0,0 +1,48 @@
+import os
+import unittest
+from unittest import mock
+
+from app import create_app
+from utils.querystats import collect
+
+
+class StartupTestCase(unittest.TestCase):
+    """This test case will test the application startup path"""
+
+    def test_no_queries_at_startup(self):
+        """
+        GIVEN a configuration other than testing
+        WHEN the application is created
+        THEN no statement is sent to the database
+        """
+        with collect() as stats:
+            app = create_app("config.DevelopmentConfig")
+
+        self.assertEqual(stats.count, 0)
+        self.assertIn("init-db", app.cli.commands)
+
+    def test_config_from_environment(self):
+        """
+        GIVEN FYYUR_CONFIG naming the deployed config class
+        WHEN the application is created without one, as the Flask CLI does
+        THEN it is configured, and caches, as the deployed workers are
+        """
+        with mock.patch.dict("os.environ", {"FYYUR_CONFIG": "config.TestingConfig"}):
+            app = create_app()
+
+        self.assertEqual(app.config["ENV"], "testing")
+        with mock.patch.dict("os.environ"):
+            os.environ.pop("FYYUR_CONFIG", None)
+            self.assertEqual(create_app().config["ENV"], "development")
+
+    def test_lazy_formatting_imports(self):
+        """
+        GIVEN a created application
+        WHEN a date is formatted with the datetime filter
+        THEN babel and dateutil are imported on first use and format it
+        """
+        app = create_app("config.TestingConfig")
+
+        formatted = app.jinja_env.filters["datetime"]("2022-09-19 20:00:00", "full")
+
+        self.assertEqual(formatted, "Monday September, 19, 2022 at 8:00PM")
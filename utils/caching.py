@@ -1,4 +1,204 @@
-from functools import cache
+import functools
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+from flask import current_app, g, request
 from flask_caching import Cache
 
 cache = Cache()
+
+# *----------------------------------------------------------------------------#
+# * View cache keys
+# *----------------------------------------------------------------------------#
+# Detail pages are cached under a fixed key per path so a write can purge
+# exactly the pages it touched. Listing pages come in unbounded cursor and
+# query string variants, so they live in a namespace whose generation token is
+# part of the key; bumping the generation orphans every variant at once and
+# the orphans simply age out.
+
+
+def page_key(path):
+    """Return the cache key of the page at ``path``, see ``cache.cached``."""
+    return f"view/{path}"
+
+
+def purge_pages(*paths):
+    """Delete the cached pages at ``paths``.
+
+    Each purge also leaves a marker for CACHE_LOCK_TIMEOUT so a rebuild that
+    read the database before the purge does not store its now stale result,
+    see ``coalesced``.
+    """
+    keys = [page_key(path) for path in paths]
+    cache.delete_many(*keys)
+    cache.set_many(
+        {f"purged/{key}": uuid4().hex[:8] for key in keys},
+        timeout=current_app.config["CACHE_LOCK_TIMEOUT"],
+    )
+
+
+def generation(namespace):
+    key = f"generation/{namespace}"
+    token = cache.get(key)
+    if token is None:
+        token = uuid4().hex[:8]
+        if not cache.add(key, token, timeout=0):
+            token = cache.get(key) or token
+    return token
+
+
+def bump_generation(*namespaces):
+    """Invalidate every cached page in ``namespaces``."""
+    for namespace in namespaces:
+        cache.set(f"generation/{namespace}", uuid4().hex[:8], timeout=0)
+
+
+def listing_key(namespace):
+    """Return a ``key_prefix`` callable for a view cached in ``namespace``."""
+
+    def key_prefix():
+        args = sorted(request.args.items(multi=True))
+        return f"view/{namespace}/{generation(namespace)}{request.path}?{args}"
+
+    return key_prefix
+
+
+def path_key():
+    """``key_prefix`` callable for a page purged by path, see ``page_key``."""
+    return page_key(request.path)
+
+
+# *----------------------------------------------------------------------------#
+# * Single-flight view cache
+# *----------------------------------------------------------------------------#
+# When a popular page expires, only the request holding the rebuild lock in
+# the shared cache recomputes it. Everyone else is served the stale copy,
+# which is kept for CACHE_STALE_TIMEOUT past its freshness, or waits for the
+# rebuild when there is nothing stale to serve (e.g. after an invalidation).
+# ``cache.add`` is atomic on Redis and memcached, which makes the lock hold
+# across workers and hosts. Pages that change with the clock, e.g. a show
+# moving from upcoming to past, call ``expire_at`` to end their freshness then.
+
+
+def _acquire(key):
+    token = uuid4().hex
+    if cache.add(
+        f"lock/{key}", token, timeout=current_app.config["CACHE_LOCK_TIMEOUT"]
+    ):
+        return token
+    return None
+
+
+def _release(key, token):
+    if cache.get(f"lock/{key}") == token:
+        cache.delete(f"lock/{key}")
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + current_app.config["CACHE_LOCK_TIMEOUT"]
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+    return None
+
+
+def expire_at(when):
+    """End the freshness of the page being built at ``when``, a naive local
+    datetime like ``Show.start_time``, if that is before CACHE_DEFAULT_TIMEOUT.
+    """
+    expires = when.timestamp()
+    g.cache_expires = min(g.get("cache_expires", expires), expires)
+
+
+def coalesced(key_prefix, unless=None):
+    """Cache a view like ``cache.cached``, rebuilding each key single-flight.
+
+    ``key_prefix`` is a callable returning the cache key of the request and
+    ``unless`` a callable that bypasses the cache when it returns true.
+    """
+
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            if unless is not None and unless():
+                return f(*args, **kwargs)
+
+            key = key_prefix()
+            entry = cache.get(key)
+            if entry is not None and time.time() < entry[0]:
+                return entry[1]
+
+            token = _acquire(key)
+            if token is None:
+                if entry is not None:
+                    return entry[1]
+                rv = _wait_for(key)
+                return rv if rv is not None else f(*args, **kwargs)
+
+            try:
+                purged = cache.get(f"purged/{key}")
+                rv = f(*args, **kwargs)
+                config = current_app.config
+                now = time.time()
+                fresh_until = min(
+                    now + config["CACHE_DEFAULT_TIMEOUT"],
+                    g.pop("cache_expires", float("inf")),
+                )
+                # a purge or generation bump during the rebuild means rv may
+                # predate the write, so it is served but not cached
+                if cache.get(f"purged/{key}") == purged and key_prefix() == key:
+                    cache.set(
+                        key,
+                        (fresh_until, rv),
+                        timeout=max(int(fresh_until - now), 1)
+                        + config["CACHE_STALE_TIMEOUT"],
+                    )
+            finally:
+                _release(key, token)
+            return rv
+
+        return decorated_function
+
+    return decorator
+
+
+# *----------------------------------------------------------------------------#
+# * In-process result cache
+# *----------------------------------------------------------------------------#
+
+
+class LRUCache(object):
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
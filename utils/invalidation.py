@@ -0,0 +1,94 @@
+from flask import has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, attributes
+
+from models.models import Artist, Show, Venue
+from utils.caching import bump_generation, purge_pages
+
+# *----------------------------------------------------------------------------#
+# * Cache invalidation
+# *----------------------------------------------------------------------------#
+# Writes to Venue, Artist and Show are collected per session on flush and the
+# affected cached pages are purged once the transaction commits, so cached
+# views can live for hours instead of going stale for a blind timeout. Pages
+# that also change with the clock expire at their next show, see
+# utils.caching.expire_at.
+
+VENUE_PAGE = "/venues/{}"
+ARTIST_PAGE = "/artists/{}"
+
+PENDING = "cache_invalidation"
+
+
+def _history(instance, name):
+    # current and, for a moved row, previous value of a column
+    history = attributes.get_history(instance, name)
+    return {value for value in history.sum() if value is not None}
+
+
+def _related(session, column, where):
+    return {row[0] for row in session.execute(select([column]).where(where).distinct())}
+
+
+def _reindex(session, instance):
+    # every worker rebuilds its in-process search index, see services.search
+    if instance in session.new or instance in session.deleted:
+        return True
+    return attributes.get_history(instance, "search_text").has_changes()
+
+
+def _collect(session, flush_context):
+    pages, namespaces = session.info.setdefault(PENDING, (set(), set()))
+    changed = list(session.new) + list(session.deleted)
+    changed += [instance for instance in session.dirty if session.is_modified(instance)]
+
+    for instance in changed:
+        if isinstance(instance, Show):
+            pages.update(VENUE_PAGE.format(id) for id in _history(instance, "venue_id"))
+            pages.update(
+                ARTIST_PAGE.format(id) for id in _history(instance, "artist_id")
+            )
+            namespaces.update(("shows", "venues", "search"))
+        elif isinstance(instance, Venue):
+            pages.add(VENUE_PAGE.format(instance.id))
+            namespaces.update(("venues", "search"))
+            if _reindex(session, instance):
+                namespaces.add("search_index")
+            if instance not in session.new:
+                # venue names and images are shown on artist pages and /shows
+                namespaces.add("shows")
+                artists = _related(
+                    session, Show.artist_id, Show.venue_id == instance.id
+                )
+                pages.update(ARTIST_PAGE.format(id) for id in artists)
+        elif isinstance(instance, Artist):
+            pages.add(ARTIST_PAGE.format(instance.id))
+            namespaces.update(("artists", "search"))
+            if _reindex(session, instance):
+                namespaces.add("search_index")
+            if instance not in session.new:
+                namespaces.add("shows")
+                venues = _related(session, Show.venue_id, Show.artist_id == instance.id)
+                pages.update(VENUE_PAGE.format(id) for id in venues)
+
+
+def _purge(session):
+    pages, namespaces = session.info.pop(PENDING, (set(), set()))
+    if not (pages or namespaces) or not has_app_context():
+        return
+    purge_pages(*pages)
+    bump_generation(*namespaces)
+
+
+def _discard(session):
+    session.info.pop(PENDING, None)
+
+
+def init_app(app):
+    for name, listener in (
+        ("after_flush", _collect),
+        ("after_commit", _purge),
+        ("after_rollback", _discard),
+    ):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
@@ -0,0 +1,230 @@
+import hmac
+import os
+import time
+from weakref import WeakSet
+
+from flask import (
+    abort,
+    before_render_template,
+    current_app,
+    g,
+    request,
+    template_rendered,
+)
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily
+from sqlalchemy import event
+
+from database import engines
+from utils.caching import cache
+
+# *----------------------------------------------------------------------------#
+# * Prometheus metrics
+# *----------------------------------------------------------------------------#
+# Exposed on /metrics. Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty
+# directory shared by the workers: every worker then writes its samples there
+# and /metrics merges them, whichever worker serves the scrape. The endpoint is
+# off unless METRICS_TOKEN is set, and scrapers send it as a bearer token.
+
+REQUEST_LATENCY = Histogram(
+    "fyyur_request_duration_seconds",
+    "Time spent serving a request.",
+    ["endpoint", "method", "status"],
+)
+TEMPLATE_RENDER = Histogram(
+    "fyyur_template_render_seconds",
+    "Time spent rendering a template.",
+    ["template"],
+)
+CACHE_REQUESTS = Counter(
+    "fyyur_cache_requests_total",
+    "Cache lookups by kind of key and result.",
+    ["kind", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "fyyur_cache_evictions_total",
+    "Cache entries removed by the application.",
+    ["kind"],
+)
+POOL_CHECKOUT = Histogram(
+    "fyyur_db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the pool.",
+    ["bind"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+POOL_CHECKED_OUT = Gauge(
+    "fyyur_db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    ["bind"],
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "fyyur_db_pool_overflow",
+    "Connections open beyond the pool size.",
+    ["bind"],
+    multiprocess_mode="livesum",
+)
+
+
+def _kind(key):
+    # view, generation, lock...
+    return key.split("/", 1)[0] if isinstance(key, str) else "other"
+
+
+class InstrumentedCache(object):
+    """Proxy to a cache backend counting hits, misses and deletions."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def get(self, key):
+        value = self.backend.get(key)
+        CACHE_REQUESTS.labels(_kind(key), "miss" if value is None else "hit").inc()
+        return value
+
+    def get_many(self, *keys):
+        values = self.backend.get_many(*keys)
+        for key, value in zip(keys, values):
+            CACHE_REQUESTS.labels(_kind(key), "miss" if value is None else "hit").inc()
+        return values
+
+    def delete(self, key):
+        deleted = self.backend.delete(key)
+        if deleted:
+            CACHE_EVICTIONS.labels(_kind(key)).inc()
+        return deleted
+
+    def delete_many(self, *keys):
+        deleted = self.backend.delete_many(*keys)
+        for key in deleted or ():
+            CACHE_EVICTIONS.labels(_kind(key)).inc()
+        return deleted
+
+
+class RedisEvictionCollector(object):
+    """Report the keys Redis itself evicted to stay under maxmemory."""
+
+    def __init__(self, backend):
+        self.client = backend._write_client
+
+    def collect(self):
+        metric = CounterMetricFamily(
+            "fyyur_cache_backend_evictions",
+            "Keys evicted by the cache server under memory pressure.",
+        )
+        try:
+            metric.add_metric([], self.client.info("stats")["evicted_keys"])
+        except Exception:
+            return
+        yield metric
+
+
+def _pool_gauges(engine, bind):
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        POOL_CHECKED_OUT.labels(bind).set(pool.checkedout())
+    if hasattr(pool, "overflow"):
+        POOL_OVERFLOW.labels(bind).set(max(pool.overflow(), 0))
+
+
+_instrumented_engines = WeakSet()
+
+
+def _instrument_engine(engine, bind):
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(engine)
+    wrap_pool_connect = engine._wrap_pool_connect
+
+    def timed_pool_connect(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return wrap_pool_connect(*args, **kwargs)
+        finally:
+            POOL_CHECKOUT.labels(bind).observe(time.perf_counter() - start)
+
+    # sessions (through Engine.connect) and raw_connection both check out
+    # through _wrap_pool_connect, which survives engine.dispose() unlike the
+    # pool itself
+    engine._wrap_pool_connect = timed_pool_connect
+    event.listen(engine, "checkout", lambda *args: _pool_gauges(engine, bind))
+    event.listen(engine, "checkin", lambda *args: _pool_gauges(engine, bind))
+
+
+def _scraper_allowed():
+    token = current_app.config["METRICS_TOKEN"]
+    scheme, _, given = request.headers.get("Authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(
+        given.encode(), token.encode()
+    )
+
+
+def registry():
+    """Return the registry to expose, merged across workers if multiprocess."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    merged = CollectorRegistry()
+    multiprocess.MultiProcessCollector(merged)
+    return merged
+
+
+def init_app(app):
+    backend = app.extensions["cache"][cache]
+    app.extensions["cache"][cache] = InstrumentedCache(backend)
+    redis_evictions = None
+    if hasattr(backend, "_write_client"):
+        redis_evictions = RedisEvictionCollector(backend)
+
+    @app.before_request
+    def start_timer():
+        for bind, engine in engines(app).items():
+            _instrument_engine(engine, bind or "default")
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            REQUEST_LATENCY.labels(
+                request.endpoint or "none", request.method, response.status_code
+            ).observe(time.perf_counter() - start)
+        return response
+
+    def start_render(sender, template, context, **extra):
+        g.setdefault("render_starts", []).append(time.perf_counter())
+
+    def observe_render(sender, template, context, **extra):
+        starts = g.get("render_starts")
+        if starts:
+            TEMPLATE_RENDER.labels(template.name).observe(
+                time.perf_counter() - starts.pop()
+            )
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(observe_render, app, weak=False)
+
+    @app.route("/metrics")
+    def metrics():
+        if not current_app.config["METRICS_TOKEN"]:
+            abort(404)
+        if not _scraper_allowed():
+            abort(401)
+        exposed = registry()
+        output = generate_latest(exposed)
+        if redis_evictions is not None:
+            scrape = CollectorRegistry()
+            scrape.register(redis_evictions)
+            output += generate_latest(scrape)
+        return output, 200, {"Content-Type": CONTENT_TYPE_LATEST}
@@ -0,0 +1,130 @@
+import cProfile
+import os
+import pstats
+import random
+import time
+from collections import defaultdict
+from glob import glob
+
+import click
+from flask import current_app, g, request
+from itsdangerous import BadSignature, TimestampSigner
+
+# *----------------------------------------------------------------------------#
+# * Request profiling
+# *----------------------------------------------------------------------------#
+# Opt-in: a PROFILE_RATE fraction of requests, and any request whose
+# PROFILE_HEADER carries a token from ``flask profile-token``, run under
+# cProfile. Profiles are dumped to PROFILE_DIR/<endpoint>/ as pstats files and
+# ``flask profile-report`` merges them into collapsed stacks, the input of
+# flamegraph.pl and speedscope.
+
+TOKEN_MAX_AGE = 60 * 60
+
+
+def _signer(app):
+    return TimestampSigner(app.config["PROFILE_SECRET"], salt="profile")
+
+
+def _requested():
+    token = request.headers.get(current_app.config["PROFILE_HEADER"])
+    if not token or not current_app.config["PROFILE_SECRET"]:
+        return False
+    try:
+        _signer(current_app).unsign(token, max_age=TOKEN_MAX_AGE)
+    except BadSignature:
+        return False
+    return True
+
+
+def _label(func):
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{lineno}({name})".replace(";", ":")
+
+
+def collapse(stats, root="all"):
+    """Return ``{stack: microseconds}`` collapsed stacks of a pstats.Stats.
+
+    cProfile keeps caller/callee edges rather than stacks, so each function's
+    own time is split between its callers in proportion to the time spent
+    under each edge.
+    """
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller in callers:
+            callees[caller].append(func)
+
+    stacks = defaultdict(float)
+
+    def visit(func, stack, share):
+        _, _, tottime, cumtime, _ = stats.stats[func]
+        stack = stack + (_label(func),)
+        stacks[";".join(stack)] += tottime * share
+        for callee in callees[func]:
+            edge_cumtime = stats.stats[callee][4][func][3]
+            callee_cumtime = stats.stats[callee][3]
+            # skip recursion and paths below a microsecond
+            if _label(callee) in stack or share * edge_cumtime < 1e-6:
+                continue
+            visit(callee, stack, share * edge_cumtime / callee_cumtime)
+
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            visit(func, (root,), 1.0)
+    return {
+        stack: int(seconds * 1e6) for stack, seconds in stacks.items() if seconds > 0
+    }
+
+
+def _profiles(directory, endpoint=None):
+    profiles = defaultdict(list)
+    for path in glob(os.path.join(directory, endpoint or "*", "*.pstats")):
+        profiles[os.path.basename(os.path.dirname(path))].append(path)
+    return profiles
+
+
+@click.command("profile-report")
+@click.option("--endpoint", default=None, help="Only report this endpoint.")
+@click.option("--output", type=click.File("w"), default="-", help="Output file.")
+def profile_report_command(endpoint, output):
+    """Merge request profiles into flame graph ready collapsed stacks."""
+    directory = current_app.config["PROFILE_DIR"]
+    for name, paths in sorted(_profiles(directory, endpoint).items()):
+        stacks = collapse(pstats.Stats(*paths), root=name)
+        for stack, microseconds in sorted(stacks.items()):
+            output.write(f"{stack} {microseconds}\n")
+
+
+@click.command("profile-token")
+def profile_token_command():
+    """Print a token that profiles requests sending it in PROFILE_HEADER."""
+    if not current_app.config["PROFILE_SECRET"]:
+        raise click.ClickException("PROFILE_SECRET is not set")
+    click.echo(_signer(current_app).sign("profile").decode())
+
+
+def init_app(app):
+    app.cli.add_command(profile_report_command)
+    app.cli.add_command(profile_token_command)
+
+    @app.before_request
+    def start_profile():
+        if random.random() < app.config["PROFILE_RATE"] or _requested():
+            g.profile = cProfile.Profile()
+            g.profile.enable()
+
+    @app.teardown_request
+    def stop_profile(exc):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return
+        profile.disable()
+        directory = os.path.join(
+            app.config["PROFILE_DIR"], request.endpoint or "unmatched"
+        )
+        os.makedirs(directory, exist_ok=True)
+        profile.dump_stats(
+            os.path.join(directory, f"{time.time():.6f}-{os.getpid()}.pstats")
+        )
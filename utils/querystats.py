@@ -0,0 +1,168 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# *----------------------------------------------------------------------------#
+# * Query statistics
+# *----------------------------------------------------------------------------#
+# Every statement sent to the database is counted, timed and fingerprinted
+# for the request (or ``query_budget`` block) it runs in. Requests report the
+# totals in a Server-Timing header and a structured log line, and statements
+# repeated more than QUERY_REPEAT_THRESHOLD times are flagged as likely N+1.
+# Other modules reuse the timing through ``on_statement``.
+
+logger = logging.getLogger("fyyur.queries")
+
+_collectors = ContextVar("query_collectors", default=())
+# callables run after every statement, see on_statement
+_observers = []
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(
+    r"\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))*\s*\)"
+)
+
+
+def fingerprint(statement):
+    """Normalize ``statement`` so that repeats with other values compare equal."""
+    statement = _LITERALS.sub("?", statement)
+    statement = _PLACEHOLDER_LISTS.sub("(?)", statement)
+    return " ".join(statement.split())
+
+
+class QueryStats(object):
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.statements[fingerprint(statement)] += 1
+
+    def repeated(self, limit):
+        """Return ``(fingerprint, count)`` for statements run over ``limit`` times."""
+        return [(s, n) for s, n in self.statements.most_common() if n > limit]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    for stats in _collectors.get():
+        stats.record(statement, duration)
+    for observer in _observers:
+        observer(conn, statement, parameters, executemany, duration)
+
+
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    starts = connection.info.get("query_start") if connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def on_statement(observer):
+    """Call ``observer(conn, statement, parameters, executemany, duration)``
+    after every statement that completes."""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def _start():
+    stats = QueryStats()
+    _collectors.set(_collectors.get() + (stats,))
+    return stats
+
+
+def _stop(stats):
+    _collectors.set(tuple(c for c in _collectors.get() if c is not stats))
+
+
+@contextmanager
+def collect():
+    """Collect the statements run inside the block into a :class:`QueryStats`."""
+    stats = _start()
+    try:
+        yield stats
+    finally:
+        _stop(stats)
+
+
+@contextmanager
+def query_budget(max_queries=None, max_repeats=None):
+    """Fail with AssertionError if the block exceeds its query budget.
+
+    ``max_queries`` bounds the number of statements and ``max_repeats`` how
+    many times any one statement fingerprint may run::
+
+        with query_budget(max_queries=3, max_repeats=1):
+            client.get("/venues/1")
+    """
+    with collect() as stats:
+        yield stats
+
+    if max_queries is not None and stats.count > max_queries:
+        raise AssertionError(
+            f"{stats.count} queries run, budget is {max_queries}:\n"
+            + "\n".join(stats.statements)
+        )
+    repeated = stats.repeated(max_repeats) if max_repeats is not None else []
+    if repeated:
+        raise AssertionError(
+            f"statements repeated more than {max_repeats} times:\n"
+            + "\n".join(f"{n}x {s}" for s, n in repeated)
+        )
+
+
+def init_app(app):
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = _start()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get("query_stats")
+        if stats is None:
+            return response
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"',
+        )
+        repeated = stats.repeated(app.config["QUERY_REPEAT_THRESHOLD"])
+        record = {
+            "endpoint": request.endpoint,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 2),
+            "repeated": [{"statement": s, "count": n} for s, n in repeated],
+        }
+        if repeated:
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(exc):
+        stats = g.pop("query_stats", None)
+        if stats is not None:
+            _stop(stats)
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from collections import defaultdict
+from datetime import datetime
+from logging.handlers import WatchedFileHandler
+
+import click
+from flask import current_app, has_app_context, has_request_context, request
+from utils import querystats
+from utils.querystats import fingerprint
+
+# *----------------------------------------------------------------------------#
+# * Slow query log
+# *----------------------------------------------------------------------------#
+# Statements slower than SLOW_QUERY_THRESHOLD seconds are written as JSON lines
+# to SLOW_QUERY_LOG with their parameters and the view that ran them. A
+# SLOW_QUERY_EXPLAIN_RATE sample of slow SELECTs also gets its plan captured:
+# EXPLAIN (ANALYZE, BUFFERS) on Postgres, EXPLAIN QUERY PLAN on SQLite. ANALYZE
+# runs the statement again, so that happens in a background thread on its own
+# pooled connection, off the request and outside its transaction, and those
+# entries are logged once their plan is in. ``flask slow-queries`` summarizes
+# the log. Statements are timed by utils.querystats. The gunicorn workers all
+# append to the one file, so it is rotated outside the app, e.g. by logrotate,
+# and reopened when it moves.
+
+logger = logging.getLogger("fyyur.slow_queries")
+
+EXPLAIN = {
+    "postgresql": "EXPLAIN (ANALYZE, BUFFERS) ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+
+# sampled statements waiting for their plan; when full, entries are logged
+# without one rather than holding up the request
+_explains = queue.Queue(maxsize=100)
+_explainer = None
+_explainer_lock = threading.Lock()
+
+
+def _log_slow(conn, statement, parameters, executemany, duration):
+    if not has_app_context() or "slow_query_log" not in current_app.extensions:
+        return
+    config = current_app.config
+    if duration < config["SLOW_QUERY_THRESHOLD"]:
+        return
+
+    entry = {
+        "time": datetime.utcnow().isoformat(),
+        "duration_ms": round(duration * 1000, 2),
+        "fingerprint": fingerprint(statement),
+        "statement": statement,
+        "parameters": parameters,
+        "endpoint": request.endpoint if has_request_context() else None,
+        "path": request.path if has_request_context() else None,
+    }
+    handler = current_app.extensions["slow_query_log"]
+    if (
+        not executemany
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and random.random() < config["SLOW_QUERY_EXPLAIN_RATE"]
+    ):
+        try:
+            _start_explainer()
+            _explains.put_nowait((conn.engine, statement, parameters, handler, entry))
+            return
+        except queue.Full:
+            pass
+    _write(handler, entry)
+
+
+def _write(handler, entry):
+    handler.handle(
+        logger.makeRecord(
+            logger.name,
+            logging.WARNING,
+            __file__,
+            0,
+            json.dumps(entry, default=str),
+            None,
+            None,
+        )
+    )
+
+
+def _explain_sampled():
+    while True:
+        engine, statement, parameters, handler, entry = _explains.get()
+        try:
+            entry["plan"] = explain(engine, statement, parameters)
+            _write(handler, entry)
+        finally:
+            _explains.task_done()
+
+
+def _start_explainer():
+    # started lazily so that each forked gunicorn worker runs its own
+    global _explainer
+    with _explainer_lock:
+        if _explainer is None or not _explainer.is_alive():
+            _explainer = threading.Thread(
+                target=_explain_sampled, name="slow-query-explain", daemon=True
+            )
+            _explainer.start()
+
+
+def wait_for_plans():
+    """Block until the sampled statements queued so far are logged."""
+    _explains.join()
+
+
+def explain(engine, statement, parameters):
+    """Return the plan of ``statement``, or None for an unsupported database.
+
+    The plan is taken on a connection of its own from ``engine``'s pool, whose
+    transaction is rolled back when it is returned.
+    """
+    prefix = EXPLAIN.get(engine.dialect.name)
+    if prefix is None:
+        return None
+    try:
+        # a raw DBAPI connection keeps the EXPLAIN out of the engine events
+        connection = engine.raw_connection()
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        connection.close()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def read_entries(path, backups=0):
+    """Yield the entries of the slow query log at ``path``, rotated files first."""
+    paths = [f"{path}.{n}" for n in range(backups, 0, -1)] + [path]
+    for name in paths:
+        if not os.path.exists(name):
+            continue
+        with open(name) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries):
+    """Return per-fingerprint totals, the most total time first."""
+    totals = defaultdict(lambda: {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+    for entry in entries:
+        total = totals[entry["fingerprint"]]
+        total["count"] += 1
+        total["total_ms"] += entry["duration_ms"]
+        total["max_ms"] = max(total["max_ms"], entry["duration_ms"])
+        total["endpoint"] = entry.get("endpoint")
+    return sorted(
+        ({"fingerprint": k, **v} for k, v in totals.items()),
+        key=lambda total: -total["total_ms"],
+    )
+
+
+@click.command("slow-queries")
+@click.option("--top", default=10, help="Number of statements to show.")
+@click.option(
+    "--log", "path", default=None, help="Log file, SLOW_QUERY_LOG by default."
+)
+def slow_queries_command(top, path):
+    """Show the statements that spent the most time in the slow query log."""
+    path = path or current_app.config["SLOW_QUERY_LOG"]
+    entries = read_entries(path, current_app.config["SLOW_QUERY_LOG_BACKUPS"])
+    for total in summarize(entries)[:top]:
+        click.echo(
+            f"{total['total_ms']:10.1f} ms total  {total['count']:6d} x  "
+            f"{total['max_ms']:8.1f} ms max  {total['endpoint']}"
+        )
+        click.echo(f"    {total['fingerprint']}")
+
+
+def init_app(app):
+    querystats.on_statement(_log_slow)
+    handler = WatchedFileHandler(app.config["SLOW_QUERY_LOG"], delay=True)
+    app.extensions["slow_query_log"] = handler
+    app.cli.add_command(slow_queries_command)
@@ -0,0 +1,8 @@
+import re
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(*values):
+    """Split ``values`` into lowercase alphanumeric search tokens."""
+    return _TOKEN.findall(" ".join(str(value) for value in values if value).lower())
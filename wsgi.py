@@ -0,0 +1,11 @@
+"""Production entry point, see gunicorn.conf.py.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+FYYUR_CONFIG names the config class, config.ProductionConfig by default.
+"""
+import os
+
+from app import create_app
+
+app = create_app(os.environ.get("FYYUR_CONFIG", "config.ProductionConfig"))